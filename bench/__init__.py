@@ -0,0 +1 @@
+"""Outils de mesure des performances du scraper et du serveur de recherche"""
@@ -0,0 +1,182 @@
+"""Faux forum myBB local pour tester et mesurer le scraper sans toucher ebdz.net.
+
+Sert index.php, member.php (login), forumdisplay.php (listing paginé),
+showthread.php (couverture, description, liens ed2k) et les images de
+couverture, avec une latence et un taux d'erreurs configurables.
+
+Les pages viennent de bench/fixtures.py, ou d'un dossier de pages
+enregistrées (--pages DOSSIER) : DOSSIER/listings/<page>.html et
+DOSSIER/threads/<tid>.html.
+
+Usage autonome :
+    python -m bench.fake_forum --port 8000 --pages-count 10 --latency 0.05
+puis pointer le scraper sur http://127.0.0.1:8000/forum/forumdisplay.php?fid=29
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from bench import fixtures
+
+
+class FakeForum:
+    """Serveur myBB factice, démarré dans un thread en arrière-plan"""
+    def __init__(self, pages=5, per_page=30, volumes=20, latency=0.0, error_rate=0.0,
+                 cover_size=50_000, record_dir=None, port=0, seed=0):
+        self.pages = pages
+        self.per_page = per_page
+        self.volumes = volumes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.cover_size = cover_size
+        self.record_dir = record_dir
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        # Connexions fermées par le client (réponse abandonnée avant un nouvel essai) : rien à signaler
+        self.server.handle_error = lambda request, client_address: None
+        self.thread = None
+
+    @property
+    def root_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/forum/"
+
+    def forum_url(self, fid=29):
+        return f"{self.root_url}forumdisplay.php?fid={fid}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-forum", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _recorded(self, kind, name):
+        """Page enregistrée si elle existe dans record_dir"""
+        if not self.record_dir:
+            return None
+        path = os.path.join(self.record_dir, kind, f"{name}.html")
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        return None
+
+    def render(self, path, query, logged_in):
+        """Retourne (statut, content-type, corps) pour une requête GET"""
+        name = path.rsplit('/', 1)[-1]
+        if name in ('', 'index.php'):
+            return 200, 'text/html; charset=utf-8', fixtures.index_page(logged_in).encode('utf-8')
+
+        if name == 'forumdisplay.php':
+            fid = int(query.get('fid', ['29'])[0])
+            page = int(query.get('page', ['1'])[0])
+            body = self._recorded('listings', page)
+            if body is None:
+                page = min(page, self.pages)
+                body = fixtures.forum_page(fid, page, self.pages, self.per_page,
+                                           first_tid=fid * 100_000, logged_in=logged_in).encode('utf-8')
+            return 200, 'text/html; charset=utf-8', body
+
+        if name == 'showthread.php':
+            tid = int(query.get('tid', ['0'])[0])
+            body = self._recorded('threads', tid)
+            if body is None:
+                cover_url = f"{self.root_url}covers/{tid % 500}.jpg"
+                body = fixtures.thread_page(tid, self.volumes, cover_url=cover_url, logged_in=logged_in).encode('utf-8')
+            return 200, 'text/html; charset=utf-8', body
+
+        if path.startswith('/forum/covers/'):
+            # Contenu déterministe par nom d'image
+            seed = sum(name.encode())
+            body = random.Random(seed).randbytes(self.cover_size)
+            return 200, 'image/jpeg', body
+
+        return 404, 'text/plain', b'Not found'
+
+    def _handler(self):
+        forum = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _logged_in(self):
+                return 'mybbuser=' in self.headers.get('Cookie', '')
+
+            def _send(self, status, content_type, body, cookie=None):
+                if forum.latency:
+                    time.sleep(forum.latency * forum.random.uniform(0.5, 1.5))
+                with forum.lock:
+                    forum.requests += 1
+                    fail = forum.random.random() < forum.error_rate
+                    if fail:
+                        forum.errors += 1
+                if fail:
+                    status, content_type, body = 503, 'text/plain', b'Service Unavailable'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if fail:
+                    self.send_header('Retry-After', '1')
+                if cookie:
+                    self.send_header('Set-Cookie', cookie)
+                self.end_headers()
+                self.wfile.write(body)
+                with forum.lock:
+                    forum.bytes_sent += len(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                self._send(*forum.render(url.path, parse_qs(url.query), self._logged_in()))
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                body = fixtures.index_page(logged_in=True).encode('utf-8')
+                self._send(200, 'text/html; charset=utf-8', body, cookie='mybbuser=1_bench; path=/')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux forum myBB local")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--pages-count', type=int, default=5, help="nombre de pages de listing")
+    parser.add_argument('--per-page', type=int, default=30, help="threads par page de listing")
+    parser.add_argument('--volumes', type=int, default=20, help="liens ed2k par thread")
+    parser.add_argument('--latency', type=float, default=0.0, help="latence moyenne par requête (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="proportion de réponses 503")
+    parser.add_argument('--pages', help="dossier de pages enregistrées (listings/ et threads/)")
+    args = parser.parse_args()
+
+    forum = FakeForum(args.pages_count, args.per_page, args.volumes, args.latency, args.error_rate,
+                      record_dir=args.pages, port=args.port)
+    print(f"🚀 Faux forum démarré : {forum.forum_url()}")
+    print("⏹️  Pour arrêter le serveur : Ctrl+C")
+    try:
+        forum.server.serve_forever()
+    except KeyboardInterrupt:
+        forum.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
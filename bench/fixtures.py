@@ -0,0 +1,130 @@
+"""Pages myBB synthétiques (listing du forum, threads) pour les benchmarks.
+
+Le balisage reprend celui d'ebdz.net : liens showthread.php?tid=..., liens
+pagination_page, colonne des réponses (MyBB.whoPosted), span.lastpost,
+li.couv pour la couverture et p.indent pour la description.
+"""
+import random
+
+SERIES = [
+    "One Piece", "Naruto", "Dragon Ball", "L'Attaque des Titans", "Berserk",
+    "Fullmetal Alchemist", "Death Note", "Hunter x Hunter", "Bleach", "Vinland Saga",
+    "Monster", "Pluto", "20th Century Boys", "Gunnm", "Akira", "Nausicaä",
+    "Détective Conan", "Blame!", "Kenshin le Vagabond", "Les Gouttes de Dieu",
+]
+
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+         "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat.")
+
+HEADER = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="UTF-8"><title>{title}</title>
+<link rel="stylesheet" href="cache/themes/theme1/global.css" />
+<script type="text/javascript">
+<!--
+    lang.unknown_error = "Une erreur inconnue s'est produite.";
+    var my_post_key = "{post_key}";
+    var cookieDomain = ".ebdz.net";
+// -->
+</script>
+</head><body>
+<div id="container"><div id="header"><div class="logo"><a href="index.php"><img src="images/logo.png" alt="ebdz" /></a></div>
+<ul class="menu top_links"><li><a href="search.php">Recherche</a></li><li><a href="memberlist.php">Membres</a></li>
+<li><a href="misc.php?action=help">Aide</a></li></ul>
+{welcome}
+</div><div id="content"><div class="navigation"><a href="index.php">ebdz</a> &rsaquo; <span class="active">{title}</span></div>
+"""
+
+FOOTER = """</div><div id="footer"><ul class="menu bottom_links"><li><a href="contact.php">Contact</a></li>
+<li><a href="#top">Retour en haut</a></li><li><a href="archive/index.php">Mode archive</a></li></ul>
+<div id="copyright">Propulsé par <a href="https://mybb.com">MyBB</a></div></div></div></body></html>
+"""
+
+LOGGED_IN = ('<div class="upper"><span class="welcome">Bienvenue, <a href="member.php?action=profile&amp;uid=42">bench</a>'
+             ' — <a href="member.php?action=logout&amp;logoutkey=abc">Déconnexion</a></span></div>')
+LOGGED_OUT = '<div class="upper"><span class="welcome">Bienvenue, invité — <a href="member.php?action=login">Connexion</a></span></div>'
+
+
+def series_title(tid):
+    """Titre de série déterministe pour un tid"""
+    return f"{SERIES[tid % len(SERIES)]} - Intégrale {tid}"
+
+
+def header(title, logged_in=True, post_key="0123456789abcdef"):
+    return HEADER.format(title=title, post_key=post_key, welcome=LOGGED_IN if logged_in else LOGGED_OUT)
+
+
+def index_page(logged_in=True):
+    """Page d'accueil du forum (utilisée par login() pour lire my_post_key)"""
+    return header("ebdz", logged_in) + '<table class="tborder"><tr><td>Forums</td></tr></table>' + FOOTER
+
+
+def forum_page(fid, page, pages, per_page=30, first_tid=1000, logged_in=True, replies=None):
+    """Page de listing forumdisplay.php?fid=...&page=...
+
+    Les tids sont numérotés à partir de first_tid, page après page.
+    replies(tid) donne le nombre de réponses d'un thread (0 par défaut).
+    """
+    rows = []
+    for i in range(per_page):
+        tid = first_tid + (page - 1) * per_page + i
+        count = replies(tid) if replies else tid % 7
+        rows.append(f"""<tr class="inline_row">
+<td align="center" class="trow1 forumdisplay_regular" width="2%"><span class="thread_status newfolder" title="Nouveaux messages">&nbsp;</span></td>
+<td align="center" class="trow1 forumdisplay_regular" width="2%"><img src="images/icons/book.png" alt="Livre" /></td>
+<td class="trow1 forumdisplay_regular"><div><span><span class=" subject_new" id="tid_{tid}"><a href="showthread.php?tid={tid}">{series_title(tid)}</a></span>
+<span class="smalltext">(Pages : <a href="showthread.php?tid={tid}&amp;page=2">2</a>)</span></span>
+<div class="author smalltext"><a href="member.php?action=profile&amp;uid={tid % 97}">posteur{tid % 97}</a></div></div></td>
+<td align="center" class="trow1 forumdisplay_regular"><a href="javascript:MyBB.whoPosted({tid});">{count}</a></td>
+<td align="center" class="trow1 forumdisplay_regular">{tid * 13 % 5000}</td>
+<td class="trow1 forumdisplay_regular" style="white-space: nowrap; text-align: right;">
+<span class="lastpost smalltext"><span title="0{1 + tid % 9}-03-2024, 1{tid % 10}:0{count % 10}">Hier</span>, 1{tid % 10}:0{count % 10}<br />
+<a href="showthread.php?tid={tid}&amp;action=lastpost">Dernier message</a> : <a href="member.php?action=profile&amp;uid=7">modo</a></span></td>
+</tr>""")
+    pagination = "".join(
+        f'<a href="forumdisplay.php?fid={fid}&amp;page={p}" class="pagination_page">{p}</a>'
+        for p in range(max(1, page - 4), min(pages, page + 4) + 1) if p != page
+    )
+    if page < pages:
+        pagination += f'<a href="forumdisplay.php?fid={fid}&amp;page={page + 1}" class="pagination_next">Suivant &raquo;</a>'
+    return (header(f"Forum {fid}", logged_in)
+            + f'<div class="float_left"><div class="pagination"><span class="pages">Pages ({pages}) :</span>'
+            + f'<span class="pagination_current">{page}</span>{pagination}</div></div>'
+            + '<table border="0" cellspacing="0" cellpadding="5" class="tborder clear">'
+            + "\n".join(rows) + "</table>" + FOOTER)
+
+
+def ed2k_link(tid, volume, size=None):
+    """Lien ed2k déterministe pour un volume d'une série"""
+    name = f"{SERIES[tid % len(SERIES)].replace(' ', '.')}.T{volume:02d}.[{tid}].cbz"
+    size = size or 20_000_000 + (tid * 7919 + volume * 104729) % 80_000_000
+    file_hash = f"{(tid * 1_000_003 + volume) * 2_654_435_761 % (1 << 128):032X}"
+    return f"ed2k://|file|{name}|{size}|{file_hash}|/"
+
+
+def thread_page(tid, volumes=20, posts=8, cover_url=None, logged_in=True, seed=None):
+    """Première page d'un thread showthread.php?tid=... avec couverture, description et liens ed2k"""
+    rnd = random.Random(tid if seed is None else seed)
+    cover_url = cover_url or f"https://covers.example/{tid}.jpg"
+    links = "<br />\n".join(
+        f'<a href="{ed2k_link(tid, v)}" target="_blank">{ed2k_link(tid, v).split("|")[2]}</a>'
+        for v in range(1, volumes + 1)
+    )
+    first_post = f"""<div class="post classic" id="post_{tid * 10}">
+<div class="post_author scaleimages"><div class="author_avatar"><a href="member.php?action=profile&amp;uid=7"><img src="uploads/avatars/avatar_7.png" alt="" /></a></div>
+<div class="author_information"><strong><span class="largetext"><a href="member.php?action=profile&amp;uid=7">modo</a></span></strong></div></div>
+<div class="post_content"><div class="post_body scaleimages" id="pid_{tid * 10}">
+<ul class="fiche"><li class="couv"><img src="{cover_url}" alt="Couverture" /></li>
+<li class="infos"><span class="label">Auteur :</span> Mangaka {tid % 31}<br /><span class="label">Éditeur :</span> Glénat</li></ul>
+<p class="indent">{series_title(tid)} — {LOREM}<br />
+{' '.join(rnd.sample(LOREM.split(), 12))}</p>
+<div class="liens">{links}</div>
+</div></div></div>"""
+    replies = "".join(f"""<div class="post classic" id="post_{tid * 10 + i}">
+<div class="post_author"><strong><a href="member.php?action=profile&amp;uid={i + 10}">membre{i + 10}</a></strong></div>
+<div class="post_content"><div class="post_body" id="pid_{tid * 10 + i}">{' '.join(rnd.choices(LOREM.split(), k=40))}
+<blockquote class="mycode_quote"><cite>modo a écrit :</cite>Merci pour le partage !</blockquote></div>
+<div class="signature scaleimages">{' '.join(rnd.choices(LOREM.split(), k=15))}</div></div></div>""" for i in range(1, posts))
+    return (header(series_title(tid), logged_in)
+            + f'<div id="posts">{first_post}{replies}</div>'
+            + FOOTER)
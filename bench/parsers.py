@@ -0,0 +1,92 @@
+"""Compare les parseurs HTML du scraper : résultats identiques et pages/seconde.
+
+Usage (depuis la racine du dépôt) :
+    python -m bench.parsers [--pages DOSSIER] [--repeat N]
+
+DOSSIER peut contenir des pages réelles enregistrées depuis le forum :
+DOSSIER/threads/*.html (showthread.php) et DOSSIER/listings/*.html
+(forumdisplay.php). Sans --pages, un corpus synthétique est généré.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from scraper import MyBBScraper, PARSER_BACKENDS, resolve_parser
+from bench import fixtures
+
+FORUM_URL = "https://ebdz.net/forum/forumdisplay.php?fid=29"
+
+
+def load_corpus(pages_dir):
+    """Charge (threads, listings) sous forme de bytes"""
+    if pages_dir:
+        def read_all(pattern):
+            result = []
+            for path in sorted(glob.glob(os.path.join(pages_dir, pattern))):
+                with open(path, 'rb') as f:
+                    result.append(f.read())
+            return result
+        return read_all('threads/*.html'), read_all('listings/*.html')
+
+    threads = [fixtures.thread_page(tid, volumes=5 + tid % 60).encode('utf-8') for tid in range(1000, 1040)]
+    listings = [fixtures.forum_page(29, page, 71).encode('utf-8') for page in range(1, 11)]
+    return threads, listings
+
+
+def extract_all(scraper, threads, listings):
+    """Tout ce que le scraper lit dans le corpus, pour comparer les parseurs"""
+    results = []
+    for content in threads:
+        results.append(scraper.parse_thread_page(content))
+    for page, content in enumerate(listings, 1):
+        results.append(scraper.parse_forum_page(content, FORUM_URL, page))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des parseurs HTML du scraper")
+    parser.add_argument('--pages', help="dossier de pages enregistrées (threads/ et listings/)")
+    parser.add_argument('--repeat', type=int, default=5, help="nombre de passes sur le corpus")
+    args = parser.parse_args()
+
+    threads, listings = load_corpus(args.pages)
+    if not threads and not listings:
+        print(f"✗ Aucune page trouvée dans {args.pages}")
+        sys.exit(1)
+    print(f"Corpus : {len(threads)} pages de thread, {len(listings)} pages de listing\n")
+
+    reference = None
+    print(f"{'Parseur':<15} {'threads/s':>10} {'listings/s':>11}  Résultats")
+    for backend in PARSER_BACKENDS:
+        if resolve_parser(backend) != backend:
+            print(f"{backend:<15} {'-':>10} {'-':>11}  (indisponible)")
+            continue
+        scraper = MyBBScraper(FORUM_URL, ':memory:', '', '', parser=backend)
+
+        # Vérifie que le parseur extrait exactement la même chose que html.parser
+        results = extract_all(scraper, threads, listings)
+        if reference is None:
+            reference = results
+        identical = "identiques" if results == reference else "✗ DIFFÉRENTS de html.parser"
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for content in threads:
+                scraper.parse_thread_page(content)
+        thread_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for page, content in enumerate(listings, 1):
+                scraper.parse_forum_page(content, FORUM_URL, page)
+        listing_time = time.perf_counter() - start
+
+        thread_rate = len(threads) * args.repeat / thread_time if threads else 0
+        listing_rate = len(listings) * args.repeat / listing_time if listings else 0
+        print(f"{backend:<15} {thread_rate:>10.1f} {listing_rate:>11.1f}  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Compare l'ancien schéma (infos du thread recopiées sur chaque lien) et la table threads.
+
+Génère une base au schéma version 2 (titre, catégorie, couverture et
+description sur chaque ligne de ed2k_links), en fait une copie migrée vers
+le schéma courant, puis mesure la taille des fichiers et la latence des
+requêtes de recherche et de la page d'accueil sur les deux.
+
+Usage (depuis la racine du dépôt) :
+    python -m bench.schema_bench [--threads 20000] [--volumes 20] [--repeat 20] [--json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import search
+from db_schema import migrate
+from bench import fixtures
+
+CATEGORIES = ["Mangas", "Comics", "BD", "Romans", "Mangas VO"]
+
+# Requêtes de search.py avant la table threads (schéma version 2)
+OLD_COLUMNS = ("id, link, filename, filesize, volume, volume_end, thread_title, "
+               "thread_url, thread_id, forum_category, cover_image, description")
+OLD_ORDER = "ORDER BY thread_title, volume, filename, id"
+OLD_FTS = f"""
+    CREATE VIRTUAL TABLE ed2k_fts USING fts5(
+        filename, thread_title, description,
+        content='ed2k_links', content_rowid='id',
+        tokenize='{search.FTS_TOKENIZER}'
+    );
+    INSERT INTO ed2k_fts(ed2k_fts) VALUES ('rebuild');
+"""
+OLD_FTS_QUERY = f"""
+    SELECT * FROM (
+        WITH matches AS (
+            SELECT rowid, bm25(ed2k_fts, {', '.join(map(str, search.FTS_WEIGHTS))}) AS score
+            FROM ed2k_fts WHERE ed2k_fts MATCH ?
+        )
+        SELECT {', '.join(f'l.{column}' for column in OLD_COLUMNS.split(', '))},
+               MIN(m.score) OVER (PARTITION BY l.thread_id) AS thread_score
+        FROM matches m JOIN ed2k_links l ON l.id = m.rowid
+    ) ORDER BY thread_score, thread_id, volume, filename, id LIMIT ?
+"""
+
+
+def old_like_query(query, volume, category):
+    sql = f"SELECT {OLD_COLUMNS} FROM ed2k_links WHERE 1=1"
+    params = []
+    if query:
+        sql += " AND (filename LIKE ? OR thread_title LIKE ?)"
+        params.extend([f"%{query}%", f"%{query}%"])
+    if volume:
+        sql += " AND volume <= ? AND COALESCE(volume_end, volume) >= ?"
+        params.extend([volume, volume])
+    if category:
+        sql += " AND forum_category = ?"
+        params.append(category)
+    return sql, params
+
+
+def build_old_db(path, args):
+    """Base au schéma version 2, remplie de threads synthétiques"""
+    connection = sqlite3.connect(path)
+    migrate(connection, target=2)
+    description = " ".join([fixtures.LOREM] * args.description_repeat)
+    rows = []
+    for tid in range(1, args.threads + 1):
+        title = fixtures.series_title(tid)
+        for volume in range(1, 1 + args.volumes // 2 + tid % args.volumes):
+            link = fixtures.ed2k_link(tid, volume)
+            rows.append((link, link.split('|')[2], link.split('|')[3], volume, None, title,
+                         f"https://ebdz.net/forum/showthread.php?tid={tid}", str(tid),
+                         CATEGORIES[tid % len(CATEGORIES)], f"covers/{tid}.jpg", f"{title} — {description}"))
+    with connection:
+        connection.executemany("""
+            INSERT INTO ed2k_links (link, filename, filesize, volume, volume_end, thread_title, thread_url,
+                                    thread_id, forum_category, cover_image, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    connection.execute("ANALYZE")
+    connection.execute("VACUUM")
+    connection.close()
+    return len(rows)
+
+
+def timed(connection, sql, params, repeat, with_threads=False):
+    """Durée médiane (ms) d'une requête, cache de pages déjà chaud.
+
+    with_threads ajoute la lecture des threads de la page, comme search_page()
+    avec le nouveau schéma.
+    """
+    def run():
+        cursor = connection.cursor()
+        rows = cursor.execute(sql, params).fetchall()
+        if with_threads:
+            search.fetch_threads(cursor, {row['thread_id'] for row in rows})
+
+    run()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 2)
+
+
+def add_fts(old_path, new_path):
+    """Index plein texte sur les deux bases ; retourne la taille de chacune ensuite"""
+    with sqlite3.connect(old_path) as connection:
+        connection.executescript(OLD_FTS)
+    connection = sqlite3.connect(new_path)
+    search.create_fts(connection)
+    search.rebuild_fts(connection)
+    connection.close()
+    return os.path.getsize(old_path), os.path.getsize(new_path)
+
+
+def open_db(path):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taille et latence : ancien schéma contre table threads")
+    parser.add_argument('--threads', type=int, default=20000)
+    parser.add_argument('--volumes', type=int, default=20, help="liens par thread (en moyenne)")
+    parser.add_argument('--description-repeat', type=int, default=3, help="longueur de la description")
+    parser.add_argument('--repeat', type=int, default=20, help="exécutions par requête")
+    parser.add_argument('--json', action='store_true', help="sortie JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ebdz-schema-')
+    try:
+        old_path = os.path.join(workdir, 'old.db')
+        new_path = os.path.join(workdir, 'new.db')
+        links = build_old_db(old_path, args)
+        shutil.copy(old_path, new_path)
+        start = time.perf_counter()
+        with sqlite3.connect(new_path) as connection:
+            migrate(connection)
+        migration_seconds = time.perf_counter() - start
+
+        limit = search.DEFAULT_LIMIT + 1
+        cases = [
+            ("Recherche par titre", ('naruto', '', '')),
+            ("Titre + catégorie", ('piece', '', CATEGORIES[1])),
+            ("Volume seul", ('', 3, '')),
+            ("Volume rare", ('', args.volumes + 5, '')),
+            ("Catégorie seule", ('', '', CATEGORIES[2])),
+        ]
+        old, new = open_db(old_path), open_db(new_path)
+        queries = []
+        for label, (query, volume, category) in cases:
+            old_sql, old_params = old_like_query(query, volume, category)
+            new_sql, new_params = search.like_base_query(query, volume, category)
+            page_sql, page_params = search.page_query(new_sql, new_params, search.LIKE_ORDER, None, limit)
+            # Total compté comme par /api/search
+            count_sql, count_params = search.count_query(
+                *search.search_count_query('like', query, volume, category, new_sql, new_params))
+            queries.append({
+                'query': label,
+                'old_ms': timed(old, f"{old_sql} {OLD_ORDER} LIMIT ?", old_params + [limit], args.repeat),
+                'new_ms': timed(new, page_sql, page_params, args.repeat, with_threads=True),
+                'old_count_ms': timed(old, *search.count_query(old_sql, old_params), args.repeat),
+                'new_count_ms': timed(new, count_sql, count_params, args.repeat),
+            })
+        queries.append({
+            'query': "Page d'accueil (threads, catégories)",
+            'old_ms': round(timed(old, "SELECT COUNT(DISTINCT thread_id) FROM ed2k_links", [], args.repeat)
+                            + timed(old, "SELECT DISTINCT forum_category FROM ed2k_links", [], args.repeat), 2),
+            'new_ms': round(timed(new, "SELECT COUNT(*) FROM threads", [], args.repeat)
+                            + timed(new, "SELECT DISTINCT forum_category FROM threads", [], args.repeat), 2),
+        })
+        old.close()
+        new.close()
+
+        results = {
+            'links': links,
+            'threads': args.threads,
+            'old_bytes': os.path.getsize(old_path),
+            'new_bytes': os.path.getsize(new_path),
+            'migration_seconds': round(migration_seconds, 2),
+            'queries': queries,
+        }
+        if search.fts5_available():
+            results['old_fts_bytes'], results['new_fts_bytes'] = add_fts(old_path, new_path)
+            old, new = open_db(old_path), open_db(new_path)
+            for label, text in (("Plein texte (titre)", 'naruto'), ("Plein texte (fichier)", 'piece t03')):
+                match = search.fts_query(text)
+                new_sql, new_params = search.fts_base_query(match, '', '')
+                page_sql, page_params = search.page_query(new_sql, new_params, search.FTS_ORDER, None, limit)
+                queries.append({
+                    'query': label,
+                    'old_ms': timed(old, OLD_FTS_QUERY, [match, limit], args.repeat),
+                    'new_ms': timed(new, page_sql, page_params, args.repeat, with_threads=True),
+                })
+            old.close()
+            new.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['threads']} threads, {results['links']} liens, migration en {results['migration_seconds']} s\n")
+    print(f"Taille de la base : {results['old_bytes'] / 1e6:.1f} Mo -> {results['new_bytes'] / 1e6:.1f} Mo "
+          f"({results['new_bytes'] / results['old_bytes']:.0%})")
+    if 'old_fts_bytes' in results:
+        print(f"Avec index plein texte : {results['old_fts_bytes'] / 1e6:.1f} Mo -> {results['new_fts_bytes'] / 1e6:.1f} Mo "
+              f"({results['new_fts_bytes'] / results['old_fts_bytes']:.0%})")
+    print()
+    print(f"{'requête':40} {'avant':>10} {'après':>10}")
+    for query in queries:
+        print(f"{query['query']:40} {query['old_ms']:>8} ms {query['new_ms']:>8} ms")
+        if 'old_count_ms' in query:
+            print(f"{'  comptage':40} {query['old_count_ms']:>8} ms {query['new_count_ms']:>8} ms")
+
+
+if __name__ == "__main__":
+    main()
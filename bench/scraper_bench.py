@@ -0,0 +1,187 @@
+"""Benchmark du scraper contre le faux forum local (bench/fake_forum.py).
+
+Mesure get_thread_links(), scrape_thread() et run() complet : threads/s,
+octets/s, temps de parsing par page et temps d'écriture SQLite.
+
+Usage (depuis la racine du dépôt) :
+    python -m bench.scraper_bench [--pages 5] [--latency 0.02] [--workers 4] [--json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from scraper import MyBBScraper, LinkWriter
+from bench.fake_forum import FakeForum
+
+
+class ByteCounter:
+    """Compte les octets reçus par une session (hook requests)"""
+    def __init__(self, session):
+        self.bytes = 0
+        session.hooks['response'].append(self)
+
+    def __call__(self, response, *args, **kwargs):
+        self.bytes += int(response.headers.get('Content-Length', 0))
+
+
+def make_scraper(forum, db_file, args, **options):
+    options.setdefault('workers', args.workers)
+    return MyBBScraper(forum.forum_url(), db_file, 'bench', 'bench', 'Bench',
+                       requests_per_second=args.rps, parser=args.parser, **options)
+
+
+def bench_listing(forum, db_file, args):
+    scraper = make_scraper(forum, db_file, args)
+    counter = ByteCounter(scraper.session)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread_links = scraper.get_thread_links(forum.forum_url(), args.pages)
+    elapsed = time.perf_counter() - start
+    return thread_links, {
+        'pages': args.pages,
+        'threads': len(thread_links),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(args.pages / elapsed, 1),
+        'bytes_per_sec': round(counter.bytes / elapsed),
+    }
+
+
+def bench_threads(forum, db_file, args, thread_links):
+    """scrape_thread() en séquentiel, sans file de couvertures"""
+    scraper = make_scraper(forum, db_file, args)
+    counter = ByteCounter(scraper.session)
+    sample = thread_links[:args.sample]
+    rows = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread_url, thread_title in sample:
+            rows.extend(scraper.scrape_thread(thread_url, thread_title))
+    elapsed = time.perf_counter() - start
+    return rows, {
+        'threads': len(sample),
+        'links': len(rows),
+        'seconds': round(elapsed, 3),
+        'threads_per_sec': round(len(sample) / elapsed, 1),
+        'bytes_per_sec': round(counter.bytes / elapsed),
+    }
+
+
+def bench_parse(forum, db_file, args, thread_links):
+    """Temps de parsing seul, sur des pages déjà téléchargées"""
+    scraper = make_scraper(forum, db_file, args)
+    pages = [scraper.get(url).content for url, _ in thread_links[:args.sample]]
+    start = time.perf_counter()
+    for content in pages:
+        scraper.parse_thread_page(content)
+        scraper.extract_ed2k_links(content.decode('utf-8'))
+    elapsed = time.perf_counter() - start
+    return {
+        'pages': len(pages),
+        'ms_per_page': round(elapsed * 1000 / len(pages), 2),
+        'pages_per_sec': round(len(pages) / elapsed, 1),
+    }
+
+
+def bench_db(db_file, rows, args):
+    """Écriture par lots des lignes scrapées, répétées pour atteindre --db-rows"""
+    scraper = MyBBScraper('http://127.0.0.1/forum/forumdisplay.php?fid=1', db_file, '', '')
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.create_table()
+    batch = []
+    for i in range(args.db_rows):
+        data = dict(rows[i % len(rows)])
+        data['link'] = f"{data['link']}#{i}"
+        batch.append(data)
+    writer = LinkWriter(scraper.connect_db(), batch_threads=args.batch_threads)
+    start = time.perf_counter()
+    for i in range(0, len(batch), args.volumes):
+        writer.add(batch[i:i + args.volumes])
+    writer.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': writer.saved,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(writer.saved / elapsed),
+    }
+
+
+def bench_run(forum, db_file, args):
+    """run() complet : login, listing, threads, couvertures et base"""
+    scraper = make_scraper(forum, db_file, args, pipeline=args.pipeline)
+    counter = ByteCounter(scraper.session)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.run(max_pages=args.pages)
+    elapsed = time.perf_counter() - start
+    threads = args.pages * args.per_page
+    return {
+        'threads': threads,
+        'seconds': round(elapsed, 3),
+        'threads_per_sec': round(threads / elapsed, 1),
+        'bytes_per_sec': round(counter.bytes / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du scraper sur un faux forum local")
+    parser.add_argument('--pages', type=int, default=5, help="pages de listing")
+    parser.add_argument('--per-page', type=int, default=30, help="threads par page")
+    parser.add_argument('--volumes', type=int, default=20, help="liens ed2k par thread")
+    parser.add_argument('--latency', type=float, default=0.02, help="latence moyenne du serveur (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="proportion de réponses 503")
+    parser.add_argument('--recorded', help="dossier de pages enregistrées à rejouer")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rps', type=float, default=1000.0, help="requêtes/seconde max vers le serveur")
+    parser.add_argument('--parser', default='html.parser')
+    parser.add_argument('--pipeline', action='store_true', help="listing et scraping en pipeline")
+    parser.add_argument('--sample', type=int, default=30, help="threads scrapés un par un")
+    parser.add_argument('--db-rows', type=int, default=20000, help="lignes écrites pour le test SQLite")
+    parser.add_argument('--batch-threads', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help="sortie JSON")
+    args = parser.parse_args()
+
+    # Le scraper écrit ses couvertures dans ./data : travaille dans un dossier temporaire
+    workdir = tempfile.mkdtemp(prefix='ebdz-bench-')
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        forum = FakeForum(args.pages, args.per_page, args.volumes, args.latency, args.error_rate,
+                          record_dir=args.recorded and os.path.join(previous_dir, args.recorded))
+        with forum:
+            thread_links, listing = bench_listing(forum, 'listing.db', args)
+            rows, threads = bench_threads(forum, 'threads.db', args, thread_links)
+            parse = bench_parse(forum, 'parse.db', args, thread_links)
+            run = bench_run(forum, 'run.db', args)
+        db = bench_db('write.db', rows, args)
+        results = {
+            'server': {'requests': forum.requests, 'errors': forum.errors, 'latency': args.latency},
+            'get_thread_links': listing,
+            'scrape_thread': threads,
+            'parse': parse,
+            'db_write': db,
+            'run': run,
+        }
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Faux forum : {args.pages} pages × {args.per_page} threads, latence {args.latency * 1000:.0f} ms, "
+          f"{args.error_rate:.0%} d'erreurs, parseur {args.parser}, {args.workers} workers\n")
+    print(f"get_thread_links : {listing['pages_per_sec']:>8} pages/s   {listing['bytes_per_sec'] / 1024:>8.0f} Ko/s")
+    print(f"scrape_thread    : {threads['threads_per_sec']:>8} threads/s {threads['bytes_per_sec'] / 1024:>8.0f} Ko/s")
+    print(f"parsing          : {parse['ms_per_page']:>8} ms/page   {parse['pages_per_sec']:>8} pages/s")
+    print(f"écriture SQLite  : {db['rows_per_sec']:>8} lignes/s ({db['rows']} lignes en {db['seconds']} s)")
+    print(f"run() complet    : {run['threads_per_sec']:>8} threads/s {run['bytes_per_sec'] / 1024:>8.0f} Ko/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Schéma de la base edbz.db, partagé par scraper.py et search.py.
+
+La version du schéma est notée dans la table schema_version : migrate()
+applique dans l'ordre les migrations qui manquent, sur place, à une base
+existante comme à une base neuve.
+"""
+import re
+import sqlite3
+
+import ed2k
+
+
+def _baseline(connection):
+    """Tables du scraper (liens, état des threads, journal des runs, couvertures)"""
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS ed2k_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link TEXT NOT NULL UNIQUE,
+            filename TEXT,
+            filesize TEXT,
+            volume INTEGER,
+            volume_end INTEGER,
+            thread_title TEXT,
+            thread_url TEXT,
+            thread_id TEXT,
+            forum_category TEXT,
+            cover_image TEXT,
+            description TEXT,
+            date_scraped TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Bases créées avant la prise en charge des plages de volumes
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(ed2k_links)")]
+    if 'volume_end' not in columns:
+        connection.execute("ALTER TABLE ed2k_links ADD COLUMN volume_end INTEGER")
+
+    # État de chaque thread pour le mode incrémental
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS thread_state (
+            thread_id TEXT PRIMARY KEY,
+            thread_url TEXT,
+            last_activity TEXT,
+            last_scraped TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Journal des runs, pour reprendre un scraping interrompu
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            forum_url TEXT,
+            forum_category TEXT,
+            max_pages INTEGER,
+            started TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished TIMESTAMP
+        )
+    """)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_run_pages (
+            run_id INTEGER,
+            page INTEGER,
+            has_next INTEGER,
+            PRIMARY KEY (run_id, page)
+        )
+    """)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_run_threads (
+            run_id INTEGER,
+            thread_url TEXT,
+            thread_title TEXT,
+            last_activity TEXT,
+            page INTEGER,
+            done INTEGER DEFAULT 0,
+            PRIMARY KEY (run_id, thread_url)
+        )
+    """)
+    # Couvertures déjà téléchargées, avec l'empreinte de leur contenu
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS covers (
+            url TEXT PRIMARY KEY,
+            content_hash TEXT,
+            path TEXT
+        )
+    """)
+
+
+def _search_indexes(connection):
+    """Index des chemins d'accès de la recherche et de la page d'accueil"""
+    # Tri par titre/volume/fichier de la recherche LIKE, liens d'un titre (recherche approchée)
+    connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ed2k_links_title
+        ON ed2k_links(thread_title, volume, filename)
+    """)
+    # Même tri, filtré par catégorie ; sert aussi la liste des catégories
+    connection.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ed2k_links_category
+        ON ed2k_links(forum_category, thread_title, volume, filename)
+    """)
+    # COUNT(DISTINCT thread_id) et regroupement des liens par thread
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_ed2k_links_thread ON ed2k_links(thread_id)")
+    # Filtre par volume (volume <= ? AND COALESCE(volume_end, volume) >= ?)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_ed2k_links_volume ON ed2k_links(volume, volume_end)")
+    # Statistiques pour que le planificateur choisisse ces index
+    connection.execute("ANALYZE ed2k_links")
+
+
+def _threads_table(connection):
+    """Sort les informations des threads de ed2k_links dans une table threads.
+
+    Titre, URL, catégorie, couverture et description étaient recopiés sur
+    chaque lien ; ils sont maintenant stockés une fois par thread_id, et
+    ed2k_links est reconstruite avec seulement les colonnes propres aux liens.
+    """
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS threads (
+            thread_id TEXT PRIMARY KEY,
+            thread_title TEXT,
+            thread_url TEXT,
+            forum_category TEXT,
+            cover_image TEXT,
+            description TEXT,
+            date_scraped TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Un thread prend les valeurs de son lien le plus récent (colonnes nues avec MAX sous SQLite)
+    connection.execute("""
+        INSERT OR IGNORE INTO threads (thread_id, thread_title, thread_url, forum_category,
+                                       cover_image, description, date_scraped)
+        SELECT COALESCE(thread_id, ''), thread_title, thread_url, forum_category,
+               cover_image, description, date_scraped
+        FROM (SELECT MAX(id), * FROM ed2k_links GROUP BY COALESCE(thread_id, ''))
+    """)
+    # Couverture arrivée sur d'anciens liens seulement
+    connection.execute("""
+        UPDATE threads SET cover_image = (
+            SELECT MAX(cover_image) FROM ed2k_links WHERE COALESCE(ed2k_links.thread_id, '') = threads.thread_id
+        ) WHERE cover_image IS NULL
+    """)
+
+    # L'index plein texte et ses triggers lisent les anciennes colonnes :
+    # search.py les recrée au prochain démarrage
+    for trigger in ('ed2k_links_fts_insert', 'ed2k_links_fts_delete', 'ed2k_links_fts_update'):
+        connection.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    connection.execute("DROP TABLE IF EXISTS ed2k_fts")
+
+    connection.execute("""
+        CREATE TABLE ed2k_links_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link TEXT NOT NULL UNIQUE,
+            filename TEXT,
+            filesize TEXT,
+            volume INTEGER,
+            volume_end INTEGER,
+            thread_id TEXT REFERENCES threads(thread_id),
+            date_scraped TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    connection.execute("""
+        INSERT INTO ed2k_links_new (id, link, filename, filesize, volume, volume_end, thread_id, date_scraped)
+        SELECT id, link, filename, filesize, volume, volume_end, COALESCE(thread_id, ''), date_scraped
+        FROM ed2k_links ORDER BY id
+    """)
+    connection.execute("DROP TABLE ed2k_links")
+    connection.execute("ALTER TABLE ed2k_links_new RENAME TO ed2k_links")
+
+    # Liens d'un thread dans l'ordre des volumes ; volume_end rend le filtre par volume couvrant
+    connection.execute("CREATE INDEX idx_ed2k_links_thread ON ed2k_links(thread_id, volume, volume_end, filename)")
+    connection.execute("CREATE INDEX idx_ed2k_links_volume ON ed2k_links(volume, volume_end)")
+    # Tri par titre de la recherche, titres de la recherche approchée
+    connection.execute("CREATE INDEX idx_threads_title ON threads(thread_title, thread_id)")
+    # Même tri, filtré par catégorie ; sert aussi la liste des catégories
+    connection.execute("CREATE INDEX idx_threads_category ON threads(forum_category, thread_title, thread_id)")
+    connection.execute("ANALYZE")
+
+
+def _ed2k_hash_columns(connection):
+    """Hash MD4 et taille en octets de chaque lien, extraits du lien ed2k et indexés"""
+    connection.execute("ALTER TABLE ed2k_links ADD COLUMN ed2k_hash TEXT")
+    connection.execute("ALTER TABLE ed2k_links ADD COLUMN filesize_bytes INTEGER")
+    # Liens déjà en base : un seul UPDATE, le lien est lu par les fonctions Python de ed2k.py
+    connection.create_function('ed2k_link_hash', 1, ed2k.link_hash, deterministic=True)
+    connection.create_function('ed2k_link_size', 1, ed2k.link_size, deterministic=True)
+    connection.execute("UPDATE ed2k_links SET ed2k_hash = ed2k_link_hash(link), filesize_bytes = ed2k_link_size(link)")
+    # Recherche d'un fichier par son hash (même fichier dans plusieurs threads ou sous plusieurs noms)
+    connection.execute("CREATE INDEX idx_ed2k_links_hash ON ed2k_links(ed2k_hash, filesize_bytes)")
+
+
+def _volume_range_index(connection):
+    """Index des liens qui couvrent plusieurs volumes (volume_end renseigné).
+    
+    Le filtre par volume se lit alors sur deux plages bornées : les liens dont
+    le volume est dans la plage demandée (idx_ed2k_links_volume), et les fichiers
+    "T01-05" commencés avant elle (cet index, qui ne contient qu'eux).
+    """
+    connection.execute("""
+        CREATE INDEX idx_ed2k_links_volume_range ON ed2k_links(volume_end, volume)
+        WHERE volume_end IS NOT NULL
+    """)
+
+
+# Migrations dans l'ordre : (version, description, fonction)
+MIGRATIONS = [
+    (1, "schéma initial", _baseline),
+    (2, "index de recherche", _search_indexes),
+    (3, "table threads séparée des liens", _threads_table),
+    (4, "hash ed2k et taille en octets des liens", _ed2k_hash_columns),
+    (5, "index des fichiers de plusieurs volumes", _volume_range_index),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Migrations qui libèrent beaucoup de place : VACUUM ensuite pour réduire le fichier
+VACUUM_AFTER = {3}
+
+
+def schema_version(connection):
+    """Version du schéma de la base (0 si elle n'a jamais été migrée)"""
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return connection.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(connection, target=None):
+    """Applique les migrations manquantes (jusqu'à target), chacune dans sa propre transaction.
+
+    BEGIN IMMEDIATE réserve l'écriture avant de relire la version : si le
+    scraper et le serveur de recherche démarrent ensemble, une seule des deux
+    connexions applique chaque migration.
+    Retourne la liste des (version, description) appliquées.
+    """
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(connection) >= version:
+                connection.rollback()
+                continue
+            apply(connection)
+            connection.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                               (version, description))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        applied.append((version, description))
+
+    if any(version in VACUUM_AFTER for version, _ in applied):
+        try:
+            connection.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ VACUUM impossible ({e}) : la place libérée sera réutilisée sans réduire le fichier")
+
+    current = schema_version(connection)
+    if current > SCHEMA_VERSION:
+        print(f"⚠️ Base en version {current}, plus récente que ce programme (version {SCHEMA_VERSION})")
+    return applied
+
+
+def migrate_file(db_file):
+    """migrate() sur le fichier de base db_file"""
+    connection = sqlite3.connect(db_file, timeout=30)
+    try:
+        return migrate(connection)
+    finally:
+        connection.close()
+
+
+# Écart de taille (en proportion) au-delà duquel les statistiques d'une table sont refaites
+STATS_STALE_RATIO = 0.2
+
+
+def stale_tables(connection, tables=('ed2k_links', 'threads')):
+    """Tables dont les statistiques du planificateur (sqlite_stat1) manquent ou
+    ne correspondent plus au nombre de lignes : le dernier ANALYZE date d'avant
+    un scraping (une base neuve est analysée vide pendant sa migration)"""
+    try:
+        recorded = dict(connection.execute("""
+            SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl
+        """).fetchall())
+    except sqlite3.OperationalError:
+        recorded = {}
+    stale = []
+    for table in tables:
+        rows = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        known = recorded.get(table)
+        if known is None:
+            if rows:
+                stale.append(table)
+        elif abs(rows - known) > STATS_STALE_RATIO * max(known, 1):
+            stale.append(table)
+    return stale
+
+
+def refresh_statistics(connection):
+    """ANALYZE des tables dont les statistiques sont périmées ; retourne leurs noms"""
+    stale = stale_tables(connection)
+    for table in stale:
+        connection.execute(f"ANALYZE {table}")
+    if stale:
+        connection.commit()
+    return stale
+
+
+def refresh_statistics_file(db_file):
+    """refresh_statistics() sur le fichier de base db_file"""
+    connection = sqlite3.connect(db_file, timeout=30)
+    try:
+        return refresh_statistics(connection)
+    finally:
+        connection.close()
+
+
+def explain(connection, sql, params=()):
+    """Plan d'exécution (EXPLAIN QUERY PLAN) d'une requête, une ligne par étape"""
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(plan, tables=('ed2k_links',), allow_sort=False, full_scans=(), indexes=()):
+    """Étapes coûteuses d'un plan : parcours (SCAN) d'une des tables, même par un
+    index, sauf pour celles de full_scans (parcours voulu, arrêté par LIMIT) ;
+    tri de tout le résultat dans un B-tree temporaire (sauf si allow_sort) ;
+    index de indexes absents du plan.
+
+    Le tri de la seule partie droite de l'ORDER BY (les liens de chaque thread,
+    l'ordre des threads venant de l'index) n'est pas signalé.
+    """
+    problems = []
+    for detail in plan:
+        scan = re.match(r'SCAN (?:TABLE )?(\w+)(?: AS (\w+))?', detail)
+        if scan and set(scan.groups()) & set(tables) and not set(scan.groups()) & set(full_scans):
+            problems.append(detail)
+        elif (detail.startswith('USE TEMP B-TREE') and 'RIGHT PART' not in detail
+                and not allow_sort):
+            problems.append(detail)
+    for index in indexes:
+        if not any(re.search(rf'\bINDEX {index}\b', detail) for detail in plan):
+            problems.append(f"index {index} non utilisé")
+    return problems
@@ -0,0 +1,45 @@
+"""Lecture des liens ed2k (ed2k://|file|nom|taille|hash|/), partagée par scraper.py et search.py.
+
+Le hash MD4 (32 caractères hexadécimaux) identifie le fichier quel que soit
+son nom : il sert à retrouver un même fichier posté dans plusieurs threads
+ou sous plusieurs noms.
+"""
+import re
+
+LINK_PATTERN = re.compile(r'ed2k://\|file\|([^|]*)\|(\d+)\|([0-9a-fA-F]{32})\|')
+HASH_PATTERN = re.compile(r'[0-9a-fA-F]{32}')
+
+
+def parse_link(link):
+    """(nom, taille en octets, hash en majuscules) d'un lien ed2k.
+
+    Un lien mal formé garde ce qui se lit encore champ par champ (nom, taille
+    texte), avec None pour le reste.
+    """
+    match = LINK_PATTERN.match(link or '')
+    if match:
+        return match.group(1), int(match.group(2)), match.group(3).upper()
+    parts = (link or '').split('|')
+    filename = parts[2] if len(parts) > 2 else None
+    size = parts[3] if len(parts) > 3 else None
+    return filename, int(size) if size and size.isdigit() else None, None
+
+
+def link_hash(link):
+    """Hash ed2k d'un lien, ou None"""
+    return parse_link(link)[2]
+
+
+def link_size(link):
+    """Taille en octets d'un lien, ou None"""
+    return parse_link(link)[1]
+
+
+def lookup_hash(item):
+    """Hash recherché pour une entrée d'API : un lien ed2k complet ou un hash seul"""
+    item = (item or '').strip()
+    if item.lower().startswith('ed2k://'):
+        return link_hash(item)
+    if HASH_PATTERN.fullmatch(item):
+        return item.upper()
+    return None
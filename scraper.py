@@ -1,24 +1,812 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 import sqlite3
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+import threading
+import queue
 import time
 import os
 import hashlib
+import random
+from email.utils import parsedate_to_datetime
+import argparse
+import sys
+import json
+import cProfile
+import pstats
+from contextlib import contextmanager
+from db_schema import migrate, schema_version, refresh_statistics
+import ed2k
+
+
+# Parseurs HTML disponibles : arbre complet ou limité aux balises lues (SoupStrainer)
+PARSER_BACKENDS = ('html.parser', 'lxml', 'strainer', 'lxml-strainer')
+
+# Seules balises lues sur chaque type de page
+PAGE_STRAINERS = {
+    'thread': SoupStrainer(class_=['couv', 'indent']),
+    'listing': SoupStrainer(['a', 'span']),
+}
+
+
+def resolve_parser(backend):
+    """Vérifie le parseur demandé et se replie sur html.parser si lxml manque"""
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Parseur inconnu: {backend} (choix: {', '.join(PARSER_BACKENDS)})")
+    if backend.startswith('lxml'):
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            fallback = 'strainer' if backend == 'lxml-strainer' else 'html.parser'
+            print(f"⚠️ Module lxml non installé, parseur '{fallback}' utilisé à la place.")
+            return fallback
+    return backend
+
+
+# Numéro de volume dans un nom de fichier : motifs essayés dans l'ordre, le
+# premier qui trouve une correspondance n'importe où dans le nom l'emporte.
+# Une plage (T01-05, Tomes 1 à 3, T01 - T05) donne aussi le dernier volume.
+# " - " sépare d'ordinaire les parties du titre : espacé, le tiret n'ouvre une
+# plage que si la fin répète le préfixe (T01 - 24 - Titre, Volume 3 - 10.cbz,
+# T05 - 06 ans ne sont pas des plages).
+_VOLUME_PREFIX = r'(?:T(?:omes?\s*)?|Vol(?:\.|umes?)?\s*)'
+_VOLUME_RANGE_END = (rf'(?:(?:(?:[-à]|\s+(?:à|a|au|to)\s+){_VOLUME_PREFIX}?|\s*-\s*{_VOLUME_PREFIX})'
+                     r'(?P<end>\d{1,3})(?!\d))?')
+VOLUME_PATTERNS = [
+    re.compile(rf'{start}(?P<start>\d{{1,3}}){_VOLUME_RANGE_END}{end}', re.IGNORECASE)
+    for start, end in [
+        (r'[Tt]', ''),                  # T01, t12, T01-05, T01 - T05 (mais T01 - 24 - Titre : 1)
+        (r'[Vv]ol\.?\s*', ''),          # Vol.01, vol 12, Vol. 1-3
+        (r'[Vv]', ''),                  # V01, v12
+        (r'Volumes?\s*', ''),           # Volume 01, Volumes 1 à 3 (mais Volume 3 - 10 : 3)
+        (r'Tomes?\s*', ''),             # Tome 01, Tomes 1 à 3
+        (r'\s-\s', r'\s'),              # - 01 -
+        (r'#', ''),                     # #01
+    ]
+]
+
+
+def extract_volume_range(filename):
+    """Retourne (premier volume, dernier volume) d'un nom de fichier.
+    
+    Le dernier volume vaut None si le fichier ne contient qu'un volume,
+    et (None, None) si aucun numéro n'est trouvé.
+    """
+    if not filename:
+        return None, None
+    for pattern in VOLUME_PATTERNS:
+        match = pattern.search(filename)
+        if match:
+            start, end = int(match.group('start')), match.group('end')
+            # "T05-01" ou "T01-01" ne sont pas des plages
+            end = int(end) if end is not None and int(end) > start else None
+            return start, end
+    return None, None
+
+
+def _volume_updates(rows):
+    """Recalcule les volumes d'un lot de lignes (id, filename, volume, volume_end).
+    
+    Exécuté dans un processus séparé par backfill_volumes(), retourne
+    seulement les lignes modifiées : (volume, volume_end, id).
+    """
+    updates = []
+    for row_id, filename, volume, volume_end in rows:
+        new_volume, new_end = extract_volume_range(filename)
+        if (new_volume, new_end) != (volume, volume_end):
+            updates.append((new_volume, new_end, row_id))
+    return updates
+
+
+def backfill_volumes(db_file, chunk_size=5000, workers=None):
+    """Recalcule volume et volume_end de toutes les lignes de ed2k_links.
+    
+    La table est lue par lots (pagination sur id), les lots sont analysés
+    dans un pool de processus et les modifications écrites par transactions
+    groupées. Permet de profiter d'un meilleur extracteur sans re-scraper.
+    """
+    connection = sqlite3.connect(db_file, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    total = connection.execute("SELECT COUNT(*) FROM ed2k_links").fetchone()[0]
+    print(f"🔄 Recalcul des volumes de {total} liens...")
+    
+    def chunks():
+        last_id = 0
+        while True:
+            rows = connection.execute("""
+                SELECT id, filename, volume, volume_end FROM ed2k_links
+                WHERE id > ? ORDER BY id LIMIT ?
+            """, (last_id, chunk_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield rows
+    
+    checked = 0
+    updated = 0
+    start = time.monotonic()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Fenêtre bornée de lots en cours : la table n'est jamais chargée en entier
+        window = deque()
+        max_pending = workers * 2
+        chunk_iter = chunks()
+        while True:
+            while len(window) < max_pending:
+                rows = next(chunk_iter, None)
+                if rows is None:
+                    break
+                window.append((len(rows), executor.submit(_volume_updates, rows)))
+            if not window:
+                break
+            count, future = window.popleft()
+            updates = future.result()
+            if updates:
+                with connection:
+                    connection.executemany("UPDATE ed2k_links SET volume = ?, volume_end = ? WHERE id = ?", updates)
+            checked += count
+            updated += len(updates)
+            print(f"  {checked}/{total} liens vérifiés, {updated} mis à jour", end='\r')
+    
+    connection.close()
+    print(f"\n✓ Volumes recalculés en {time.monotonic() - start:.1f}s : {updated} liens mis à jour sur {checked}")
+    return updated
+
+
+def make_soup(content, backend, page_kind):
+    """Construit l'arbre d'une page ('thread' ou 'listing') avec le parseur choisi"""
+    builder = 'lxml' if backend.startswith('lxml') else 'html.parser'
+    parse_only = PAGE_STRAINERS[page_kind] if backend.endswith('strainer') else None
+    return BeautifulSoup(content, builder, parse_only=parse_only)
+
+
+def make_session(pool_size=10):
+    """Session HTTP avec un pool de connexions keep-alive de pool_size connexions par hôte"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max(10, pool_size))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class RateLimiter:
+    """Seau de jetons (token bucket) partagé entre les threads, à débit adaptatif.
+    
+    Le débit suit un schéma AIMD : il remonte doucement vers max_rate tant que
+    le serveur répond vite, et il est divisé par deux dès que le serveur
+    ralentit (latence au-delà de slow_factor fois la latence de référence),
+    répond 429/503 ou ne répond plus. Un Retry-After suspend les requêtes
+    vers l'hôte pendant la durée demandée.
+    """
+    # Poids d'une réponse dans la latence de référence (moyenne mobile lente),
+    # et réponses observées avant de s'y fier
+    BASE_WEIGHT = 0.02
+    WARMUP = 10
+    
+    def __init__(self, rate, burst=1, max_rate=None, min_rate=None, slow_factor=3.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max(max_rate or rate, rate)
+        self.min_rate = min_rate or min(rate, 0.1)
+        self.slow_factor = slow_factor
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.last_decrease = 0
+        self.latency = None
+        self.base_latency = None
+        self.samples = 0
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def on_success(self, latency):
+        """Réponse normale : augmentation additive, sauf si le serveur ralentit"""
+        with self.lock:
+            # Latence lissée (rapide) et latence de référence (moyenne lente) : la référence
+            # suit les pages plus lourdes ou un serveur plus lent, seule une hausse
+            # brusque par rapport à elle réduit le débit
+            self.samples += 1
+            if self.latency is None:
+                self.latency = self.base_latency = latency
+            else:
+                self.latency = 0.8 * self.latency + 0.2 * latency
+                if self.samples <= self.WARMUP:
+                    # Premières réponses (connexion, petite page) : pas encore de référence fiable
+                    self.base_latency = self.latency
+                else:
+                    self.base_latency = (1 - self.BASE_WEIGHT) * self.base_latency + self.BASE_WEIGHT * latency
+            if self.latency > self.slow_factor * self.base_latency:
+                self._decrease()
+            else:
+                # Environ +1 requête/s pour chaque seconde de réponses rapides
+                self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+    
+    def on_throttle(self, retry_after=None):
+        """429/503, timeout ou connexion refusée : diminution multiplicative"""
+        with self.lock:
+            self._decrease()
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+    
+    def _decrease(self):
+        # Une seule diminution par fenêtre : les réponses des requêtes déjà
+        # parties au débit précédent ne doivent pas la répéter
+        now = time.monotonic()
+        if now - self.last_decrease >= max(1.0, 1 / self.rate):
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.last_decrease = now
+
+
+class HostRateLimiter:
+    """Un seau de jetons par hôte, pour limiter les requêtes/seconde vers chaque serveur"""
+    def __init__(self, rate, burst=1, max_rate=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.buckets = {}
+        self.lock = threading.Lock()
+    
+    def bucket(self, url):
+        """Retourne le seau associé à l'hôte de l'URL"""
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = RateLimiter(self.rate, self.burst, self.max_rate)
+            return self.buckets[host]
+    
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+
+# Réponses qui valent un nouvel essai : surcharge ou erreur passagère du serveur
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(response, limit=300):
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), None sinon"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0), limit)
+
+
+class ScrapeStats:
+    """Compteurs et chronomètres d'un run, partagés entre les threads.
+    
+    Les étapes (login, parse, covers, db) cumulent le temps passé par tous
+    les threads, les requêtes alimentent un histogramme de latence. Avec
+    profile=True, chaque étape est aussi profilée par cProfile.
+    """
+    # Bornes de l'histogramme de latence, en millisecondes
+    LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+    
+    def __init__(self, profile=False):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counters = {}
+        self.stages = {}
+        self.latency_histogram = [0] * (len(self.LATENCY_BUCKETS) + 1)
+        self.latency_max = 0.0
+        self.profile = profile
+        self.profilers = {}
+        self._local = threading.local()
+    
+    def add(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def record_fetch(self, latency, status, size):
+        """Enregistre une réponse HTTP (ou une erreur réseau si status vaut None)"""
+        bucket = 0
+        while bucket < len(self.LATENCY_BUCKETS) and latency * 1000 > self.LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        with self.lock:
+            self.latency_histogram[bucket] += 1
+            self.latency_max = max(self.latency_max, latency)
+            for name, value in (('requests', 1), ('fetch_seconds', latency), ('bytes', size),
+                                ('http_errors', 1 if status is None or status >= 400 else 0)):
+                self.counters[name] = self.counters.get(name, 0) + value
+    
+    @contextmanager
+    def stage(self, name):
+        """Chronomètre (et profile si demandé) le bloc comme étape name"""
+        profiler = self._start_profiler(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+                self._local.profiling = False
+            with self.lock:
+                count, seconds = self.stages.get(name, (0, 0.0))
+                self.stages[name] = (count + 1, seconds + elapsed)
+    
+    def _start_profiler(self, name):
+        # Un seul profileur actif par thread : une étape imbriquée est comptée dans la première
+        if not self.profile or getattr(self._local, 'profiling', False):
+            return None
+        key = (name, threading.get_ident())
+        with self.lock:
+            profiler = self.profilers.setdefault(key, cProfile.Profile())
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ : un seul profileur à la fois pour tout le processus
+            return None
+        self._local.profiling = True
+        return profiler
+    
+    def summary(self, **extra):
+        """Totaux du run sous forme de dict sérialisable en JSON"""
+        with self.lock:
+            counters = dict(self.counters)
+            stages = dict(self.stages)
+            histogram = list(self.latency_histogram)
+        wall = time.monotonic() - self.started
+        requests_count = counters.get('requests', 0)
+        db_seconds = stages.get('db', (0, 0.0))[1]
+        labels = [f"<={bound}" for bound in self.LATENCY_BUCKETS] + [f">{self.LATENCY_BUCKETS[-1]}"]
+        return {
+            **extra,
+            'wall_seconds': round(wall, 3),
+            'threads': {
+                'scraped': counters.get('threads', 0),
+                'failed': counters.get('threads_failed', 0),
+                'per_sec': round(counters.get('threads', 0) / wall, 2) if wall else 0,
+            },
+            'fetch': {
+                'requests': requests_count,
+                'http_errors': counters.get('http_errors', 0),
+                'retries': counters.get('retries', 0),
+                'bytes': counters.get('bytes', 0),
+                'seconds': round(counters.get('fetch_seconds', 0), 3),
+                'mean_ms': round(counters.get('fetch_seconds', 0) * 1000 / requests_count, 1) if requests_count else 0,
+                'max_ms': round(self.latency_max * 1000, 1),
+                'latency_histogram_ms': dict(zip(labels, histogram)),
+            },
+            'covers': {
+                'downloaded': counters.get('covers', 0),
+                'bytes': counters.get('cover_bytes', 0),
+                'seconds': round(stages.get('covers', (0, 0.0))[1], 3),
+            },
+            'db': {
+                'rows': counters.get('rows', 0),
+                'seconds': round(db_seconds, 3),
+                'rows_per_sec': round(counters.get('rows', 0) / db_seconds) if db_seconds else 0,
+            },
+            # Temps cumulé de tous les threads : peut dépasser la durée du run
+            'stages': {name: {'count': count, 'seconds': round(seconds, 3)}
+                       for name, (count, seconds) in sorted(stages.items())},
+        }
+    
+    def dump_profiles(self, directory, prefix='run'):
+        """Écrit un fichier .prof par étape (tous threads confondus) ; retourne leurs chemins"""
+        by_stage = {}
+        for (name, _), profiler in self.profilers.items():
+            by_stage.setdefault(name, []).append(profiler)
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, profilers in sorted(by_stage.items()):
+            stats = None
+            for profiler in profilers:
+                try:
+                    stats = pstats.Stats(profiler) if stats is None else stats.add(profiler)
+                except TypeError:
+                    # Profileur jamais activé (aucune donnée)
+                    continue
+            if stats is None:
+                continue
+            path = os.path.join(directory, f"{prefix}-{name}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+
+class CoverDownloader:
+    """File de téléchargement des couvertures, en parallèle du scraping.
+    
+    Une URL n'est téléchargée qu'une fois par run ; l'image est écrite sur le
+    disque au fil de l'eau et une image identique déjà connue (même empreinte
+    sha1, URL différente) est réutilisée au lieu d'être stockée en double.
+    Les couvertures terminées sont rendues par drain() pour être reportées en base.
+    """
+    def __init__(self, get, known_covers=(), covers_dir='./data/covers', workers=2, log=print, stats=None):
+        self.get = get
+        self.log = log
+        self.stats = stats or ScrapeStats()
+        self.covers_dir = covers_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='covers')
+        self.lock = threading.Lock()
+        self.queued = {}
+        self.url_paths = {}
+        self.by_content = {}
+        for url, content_hash, path in known_covers:
+            self.url_paths[url] = path
+            if content_hash:
+                self.by_content[content_hash] = path
+        self.completed = queue.Queue()
+    
+    def _legacy_path(self, image_url):
+        """Nom de fichier historique : md5 de l'URL + extension"""
+        url_hash = hashlib.md5(image_url.encode()).hexdigest()
+        ext = os.path.splitext(image_url)[1] or '.jpg'
+        return f"{url_hash}{ext}"
+    
+    def request(self, image_url, thread_id):
+        """Demande la couverture d'un thread.
+        
+        Retourne le chemin local si l'image est déjà sur le disque, sinon None :
+        le téléchargement part en arrière-plan et le chemin sera rendu par drain().
+        """
+        filename = self._legacy_path(image_url)
+        with self.lock:
+            path = self.url_paths.get(image_url)
+            if path and os.path.exists(os.path.join(self.covers_dir, os.path.basename(path))):
+                return path
+            if os.path.exists(os.path.join(self.covers_dir, filename)):
+                return f"covers/{filename}"
+            
+            future = self.queued.get(image_url)
+            if future is None:
+                future = self.executor.submit(self._download, image_url, filename)
+                self.queued[image_url] = future
+        
+        def report(done_future):
+            if not done_future.cancelled() and done_future.result():
+                path, content_hash = done_future.result()
+                self.completed.put((thread_id, image_url, content_hash, path))
+        future.add_done_callback(report)
+        return None
+    
+    def _download(self, image_url, filename):
+        """Télécharge une image en streaming ; retourne (chemin, empreinte) ou None"""
+        with self.stats.stage('covers'):
+            return self._download_file(image_url, filename)
+    
+    def _download_file(self, image_url, filename):
+        filepath = os.path.join(self.covers_dir, filename)
+        try:
+            response = self.get(image_url, timeout=10, stream=True)
+            try:
+                if response.status_code != 200:
+                    self.log(f"    ✗ Échec du téléchargement de la couverture: HTTP {response.status_code}")
+                    return None
+                digest = hashlib.sha1()
+                size = 0
+                with open(filepath + '.part', 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            finally:
+                response.close()
+            self.stats.add('covers')
+            self.stats.add('cover_bytes', size)
+            
+            content_hash = digest.hexdigest()
+            with self.lock:
+                existing = self.by_content.get(content_hash)
+                if existing:
+                    # Même image déjà stockée sous une autre URL
+                    os.remove(filepath + '.part')
+                    self.url_paths[image_url] = existing
+                    return existing, content_hash
+                os.replace(filepath + '.part', filepath)
+                path = f"covers/{filename}"
+                self.by_content[content_hash] = path
+                self.url_paths[image_url] = path
+            self.log(f"    ✓ Couverture sauvegardée: {filename}")
+            return path, content_hash
+        except Exception as e:
+            self.log(f"    ✗ Erreur téléchargement couverture: {e}")
+            if os.path.exists(filepath + '.part'):
+                os.remove(filepath + '.part')
+            return None
+    
+    def drain(self):
+        """Retourne les couvertures terminées depuis le dernier appel"""
+        finished = []
+        while True:
+            try:
+                finished.append(self.completed.get_nowait())
+            except queue.Empty:
+                return finished
+    
+    def close(self, wait=True):
+        """Attend la fin des téléchargements (ou les annule) et retourne les derniers terminés"""
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+        return self.drain()
+
+
+class LinkWriter:
+    """Écrit les liens scrapés dans SQLite par lots.
+    
+    Une seule connexion (mode WAL) reste ouverte pendant tout le run ; les
+    liens sont insérés avec executemany et validés tous les batch_threads
+    threads ou toutes les batch_seconds secondes. Les informations du thread
+    (titre, catégorie, couverture, description) vont une seule fois dans la
+    table threads, avant ses liens.
+    """
+    def __init__(self, connection, batch_threads=50, batch_seconds=10.0, stats=None, log=print):
+        self.connection = connection
+        self.stats = stats or ScrapeStats()
+        self.log = log
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.batch_threads = batch_threads
+        self.batch_seconds = batch_seconds
+        self.pending_thread_rows = []
+        self.pending_links = []
+        self.pending_states = []
+        self.pending_done = []
+        self.pending_covers = []
+        self.thread_covers = {}
+        self.pending_threads = 0
+        self.last_flush = time.monotonic()
+        self.saved = 0
+        self.duplicates = 0
+        self.orphans = 0
+    
+    def add(self, ed2k_data, state=None, done=None):
+        """Ajoute les liens d'un thread au lot courant.
+        
+        state est l'état incrémental du thread, done son entrée (run_id, url)
+        dans le journal du run : les deux sont validés avec les liens.
+        """
+        # Une ligne threads par thread_id distinct : save_to_db() peut recevoir
+        # les liens de plusieurs threads dans la même liste
+        threads = {}
+        for data in ed2k_data:
+            threads.setdefault(data['thread_id'], data)
+        for thread_id, thread in threads.items():
+            # La couverture a pu finir de télécharger avant que le thread n'arrive ici
+            cover_image = thread['cover_image'] or self.thread_covers.get(thread_id)
+            self.pending_thread_rows.append((
+                thread_id, thread['thread_title'], thread['thread_url'],
+                thread['forum_category'], cover_image, thread['description']
+            ))
+        for data in ed2k_data:
+            self.pending_links.append((
+                data['link'], data['filename'], data['filesize'], data['volume'], data['volume_end'],
+                data['thread_id'], data['ed2k_hash'], data['filesize_bytes']
+            ))
+        if state:
+            self.pending_states.append(state)
+        if done:
+            self.pending_done.append(done)
+        self.pending_threads += 1
+        
+        if (self.pending_threads >= self.batch_threads
+                or time.monotonic() - self.last_flush >= self.batch_seconds):
+            self.flush()
+    
+    def add_covers(self, covers):
+        """Reporte des couvertures téléchargées (thread_id, url, empreinte, chemin) sur leurs threads"""
+        for thread_id, image_url, content_hash, path in covers:
+            self.thread_covers[thread_id] = path
+            self.pending_covers.append((thread_id, image_url, content_hash, path))
+    
+    def flush(self):
+        """Valide le lot courant dans une seule transaction"""
+        if (self.pending_thread_rows or self.pending_links or self.pending_states
+                or self.pending_done or self.pending_covers):
+            with self.stats.stage('db'):
+                with self.connection:
+                    # Le thread d'abord (ses liens y font référence), mis à jour s'il existe déjà
+                    self.connection.executemany("""
+                        INSERT INTO threads (thread_id, thread_title, thread_url, forum_category, cover_image, description)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(thread_id) DO UPDATE SET
+                            thread_title = excluded.thread_title,
+                            thread_url = excluded.thread_url,
+                            forum_category = excluded.forum_category,
+                            cover_image = COALESCE(excluded.cover_image, threads.cover_image),
+                            description = COALESCE(excluded.description, threads.description)
+                    """, self.pending_thread_rows)
+                    links = self.drop_orphans(self.pending_links)
+                    cursor = self.connection.executemany("""
+                        INSERT OR IGNORE INTO ed2k_links (link, filename, filesize, volume, volume_end, thread_id,
+                                                          ed2k_hash, filesize_bytes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, links)
+                    inserted = max(cursor.rowcount, 0)
+                    # Les threads ne sont marqués à jour qu'avec leurs liens
+                    self.connection.executemany("""
+                        INSERT INTO thread_state (thread_id, thread_url, last_activity, last_scraped)
+                        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(thread_id) DO UPDATE SET
+                            thread_url = excluded.thread_url,
+                            last_activity = excluded.last_activity,
+                            last_scraped = excluded.last_scraped
+                    """, self.pending_states)
+                    self.connection.executemany("""
+                        UPDATE scrape_run_threads SET done = 1 WHERE run_id = ? AND thread_url = ?
+                    """, self.pending_done)
+                    # Couvertures arrivées après l'insertion des liens de leur thread
+                    self.connection.executemany("""
+                        INSERT OR REPLACE INTO covers (url, content_hash, path) VALUES (?, ?, ?)
+                    """, [(url, content_hash, path) for _, url, content_hash, path in self.pending_covers])
+                    self.connection.executemany("""
+                        UPDATE threads SET cover_image = ? WHERE thread_id = ?
+                    """, [(path, thread_id) for thread_id, _, _, path in self.pending_covers])
+                self.saved += inserted
+                self.duplicates += len(links) - inserted
+                self.stats.add('rows', inserted)
+        
+        self.pending_thread_rows = []
+        self.pending_links = []
+        self.pending_states = []
+        self.pending_done = []
+        self.pending_covers = []
+        self.pending_threads = 0
+        self.last_flush = time.monotonic()
+    
+    def drop_orphans(self, links):
+        """Écarte (et signale) les liens dont le thread n'a pas de ligne dans threads :
+        la recherche joint les deux tables, ils n'y apparaîtraient jamais"""
+        queued = {row[0] for row in self.pending_thread_rows}
+        missing = {link[5] for link in links} - queued
+        if missing:
+            placeholders = ', '.join('?' for _ in missing)
+            missing -= {row[0] for row in self.connection.execute(
+                f"SELECT thread_id FROM threads WHERE thread_id IN ({placeholders})", list(missing))}
+        if not missing:
+            return links
+        kept = [link for link in links if link[5] not in missing]
+        orphans = len(links) - len(kept)
+        self.orphans += orphans
+        self.stats.add('orphan_links', orphans)
+        self.log(f"⚠️ {orphans} liens ignorés : thread sans ligne dans threads ({', '.join(sorted(map(str, missing)))})")
+        return kept
+    
+    def record_page(self, run_id, page, page_threads, has_next):
+        """Inscrit une page de listing et ses threads dans le journal du run"""
+        with self.connection:
+            self.connection.execute("""
+                INSERT OR REPLACE INTO scrape_run_pages (run_id, page, has_next) VALUES (?, ?, ?)
+            """, (run_id, page, int(has_next)))
+            self.connection.executemany("""
+                INSERT OR IGNORE INTO scrape_run_threads (run_id, thread_url, thread_title, last_activity, page)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(run_id, url, title, activity, page) for url, title, activity in page_threads])
+    
+    def finish_run(self, run_id):
+        """Marque le run comme terminé et purge son journal.
+        
+        Les threads en échec restent dans le journal : le prochain run du forum
+        les reprend, même si le listing incrémental s'arrête avant leur page.
+        """
+        self.flush()
+        with self.connection:
+            self.connection.execute("UPDATE scrape_runs SET finished = CURRENT_TIMESTAMP WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM scrape_run_pages WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM scrape_run_threads WHERE run_id = ? AND done = 1", (run_id,))
+    
+    def close(self):
+        """Valide le dernier lot et ferme la connexion"""
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
+
+
+# Date et heure du dernier message dans la colonne lastpost du listing
+_LASTPOST_DATE = re.compile(r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}')
+_LASTPOST_TIME = re.compile(r'\d{1,2}:\d{2}(?:\s*[AP]M)?', re.IGNORECASE)
+
+
+def lastpost_signature(span):
+    """Signature du dernier message d'un thread listé : date, heure, pid et auteur.
+    
+    MyBB affiche "Hier, 10:05" (date absolue en attribut title) puis, le
+    lendemain, "17-10-2026, 10:05" : la date est lue dans le title quand il y
+    en a un, et seules la date et l'heure sont gardées, pour que la signature
+    reste la même.
+    """
+    text = span.get_text(' ', strip=True)
+    for tag in span.find_all(title=True):
+        relative = tag.get_text(' ', strip=True)
+        if relative:
+            text = text.replace(relative, tag['title'], 1)
+    date = _LASTPOST_DATE.search(text)
+    time_of_day = _LASTPOST_TIME.search(text)
+    if date or time_of_day:
+        when = ' '.join(match.group(0).upper() for match in (date, time_of_day) if match)
+    else:
+        when = text
+    pid = ''
+    author = ''
+    for link in span.find_all('a', href=True):
+        match = re.search(r'pid=(\d+)', link['href'])
+        if match:
+            pid = match.group(1)
+        elif 'uid=' in link['href']:
+            author = link.get_text(strip=True)
+    return f"{when}|{pid}|{author}"
+
+
+class SessionExpired(Exception):
+    """Page du forum toujours déconnectée malgré la reconnexion"""
+
 
 class MyBBScraper:
-    def __init__(self, base_url, db_file, username, password, forum_category=""):
+    def __init__(self, base_url, db_file, username, password, forum_category="",
+                 workers=1, requests_per_second=1.0, pipeline=False, queue_size=4,
+                 incremental=False, batch_threads=50, batch_seconds=10.0, parser='html.parser',
+                 cover_workers=2, session=None, rate_limiter=None, log_prefix="", cookies_file=None,
+                 max_requests_per_second=None, retries=3, backoff=1.0, timeout=30, profile_dir=None):
         self.base_url = base_url
         self.db_file = db_file
         self.username = username
         self.password = password
         self.forum_category = forum_category
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.workers = max(1, workers)
+        self.pipeline = pipeline
+        self.queue_size = max(1, queue_size)
+        self.incremental = incremental
+        self.cover_workers = cover_workers
+        self.covers = None
+        self.batch_threads = batch_threads
+        self.batch_seconds = batch_seconds
+        self.parser = resolve_parser(parser)
+        # Session et limiteur peuvent être partagés entre plusieurs forums (MultiForumRunner)
+        self.session = session or make_session(self.workers)
+        self.rate_limiter = rate_limiter or HostRateLimiter(requests_per_second, max_rate=max_requests_per_second)
+        # Nouveaux essais sur timeout, erreur réseau ou 429/5xx
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        # Statistiques du run ; avec profile_dir, un profil cProfile par étape
+        self.profile_dir = profile_dir
+        self.stats = ScrapeStats(profile=bool(profile_dir))
         self.logged_in = False
+        self.listing_error = False
+        self.log_prefix = log_prefix
+        self.stop_event = threading.Event()
+        # ANALYZE en fin de run (MultiForumRunner le fait une fois pour tous les forums)
+        self.analyze_after_run = True
+        self.forum_root = base_url.split('forumdisplay.php')[0]
+        
+        # Cookies de session conservés entre deux lancements
+        self.cookies_file = cookies_file
+        # Verrou et compteur de connexions, partagés avec les autres forums de la session
+        self.auth = {'lock': threading.Lock(), 'generation': 0, 'login_failed': False}
+        
+        # Sortie des workers, bufferisée par thread pour garder l'ordre des logs
+        self._local = threading.local()
+        self._cover_locks = {}
+        self._cover_locks_guard = threading.Lock()
         
         # Créer les répertoires nécessaires
         os.makedirs('./data/covers', exist_ok=True)
@@ -26,18 +814,177 @@ class MyBBScraper:
     def connect_db(self):
         """Connexion à la base SQLite"""
         try:
-            connection = sqlite3.connect(self.db_file)
+            # Plusieurs forums peuvent écrire en même temps : attend le verrou
+            connection = sqlite3.connect(self.db_file, timeout=30)
             return connection
         except Exception as e:
-            print(f"Erreur de connexion SQLite: {e}")
+            self.log(f"Erreur de connexion SQLite: {e}")
             return None
     
+    def log(self, message=""):
+        """Affiche un message, ou le bufferise si on est dans un worker"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(message)
+        elif self.log_prefix:
+            # Préfixe la catégorie quand plusieurs forums tournent en même temps
+            text = message.lstrip('\n')
+            print('\n' * (len(message) - len(text)) + self.log_prefix + text)
+        else:
+            print(message)
+    
+    def request(self, method, url, check_login=True, **kwargs):
+        """Requête HTTP soumise au limiteur de débit par hôte.
+        
+        Si une page du forum revient déconnectée (session expirée), le scraper
+        se reconnecte une fois et relance la requête ; SessionExpired est levée
+        si la page reste déconnectée, pour que le thread compte comme échoué.
+        """
+        check_login = check_login and not kwargs.get('stream')
+        if check_login and self.auth.get('login_failed'):
+            # La reconnexion a déjà échoué : inutile d'interroger le forum
+            raise SessionExpired(f"session expirée, reconnexion impossible : {url}")
+        generation = self.auth['generation']
+        response = self._send(method, url, **kwargs)
+        
+        if check_login and self.logged_in and self.is_logged_out(url, response):
+            if not self.relogin(generation):
+                raise SessionExpired(f"session expirée, reconnexion impossible : {url}")
+            response = self._send(method, url, **kwargs)
+            if self.is_logged_out(url, response):
+                raise SessionExpired(f"page toujours déconnectée après reconnexion : {url}")
+        return response
+    
+    def _send(self, method, url, **kwargs):
+        """Envoie une requête avec nouveaux essais et backoff exponentiel aléatoire.
+        
+        Chaque réponse ajuste le débit de l'hôte : 429/503 et timeouts le
+        réduisent, les réponses rapides le font remonter. La dernière réponse
+        est retournée (ou la dernière exception levée) si tous les essais échouent.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        bucket = self.rate_limiter.bucket(url)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            start = time.monotonic()
+            response, error, retry_after = None, None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.stats.record_fetch(time.monotonic() - start, None, 0)
+                bucket.on_throttle()
+                error = e
+            else:
+                size = response.headers.get('Content-Length')
+                if size is None and not kwargs.get('stream'):
+                    size = len(response.content)
+                self.stats.record_fetch(time.monotonic() - start, response.status_code, int(size or 0))
+                if response.status_code not in RETRY_STATUSES:
+                    bucket.on_success(time.monotonic() - start)
+                    return response
+                retry_after = retry_after_seconds(response)
+                if response.status_code in (429, 503):
+                    bucket.on_throttle(retry_after)
+            
+            if attempt == self.retries or self.stop_event.is_set():
+                break
+            attempt += 1
+            self.stats.add('retries')
+            # Backoff exponentiel avec gigue, au moins le Retry-After demandé
+            delay = max(retry_after or 0, self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            reason = type(error).__name__ if error else f"HTTP {response.status_code}"
+            self.log(f"    ⚠️ {reason} sur {url[:60]}, nouvel essai dans {delay:.1f}s ({attempt}/{self.retries})")
+            if response is not None:
+                response.close()
+            if self.stop_event.wait(delay):
+                break
+        
+        if error:
+            raise error
+        return response
+    
+    def is_logged_out(self, url, response):
+        """Vrai si une page HTML du forum n'affiche plus le lien de déconnexion"""
+        if not url.startswith(self.forum_root) or response.status_code != 200:
+            return False
+        if 'text/html' not in response.headers.get('Content-Type', ''):
+            return False
+        return 'action=logout' not in response.text and 'Déconnexion' not in response.text
+    
+    def relogin(self, seen_generation):
+        """Se reconnecte après expiration de la session (une seule fois pour tous les workers)"""
+        with self.auth['lock']:
+            if self.auth['generation'] != seen_generation:
+                # Un autre worker s'est déjà reconnecté entre-temps
+                return True
+            if self.auth.get('login_failed'):
+                return False
+            self.log("⚠️ Session expirée, reconnexion...")
+            if self.login():
+                return True
+            # Noté pour tous les workers (et forums) : les requêtes suivantes échouent sans attendre
+            self.auth['login_failed'] = True
+            self.log("✗ Reconnexion impossible : les threads restants comptent comme échoués")
+            return False
+    
+    def load_cookies(self):
+        """Restaure les cookies de la dernière session ; vrai si un cookie de connexion est présent"""
+        if not self.cookies_file or not os.path.exists(self.cookies_file):
+            return False
+        try:
+            with open(self.cookies_file, 'r') as f:
+                cookies = json.load(f)
+            for cookie in cookies:
+                self.session.cookies.set_cookie(requests.cookies.create_cookie(**cookie))
+        except Exception as e:
+            self.log(f"⚠️ Impossible de charger les cookies: {e}")
+            return False
+        # Cookie posé par myBB une fois connecté
+        return any(cookie['name'] == 'mybbuser' for cookie in cookies)
+    
+    def save_cookies(self):
+        """Sauvegarde les cookies de session (lisibles par l'utilisateur seul)"""
+        if not self.cookies_file:
+            return
+        cookies = [{
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure,
+        } for cookie in self.session.cookies]
+        try:
+            fd = os.open(self.cookies_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cookies, f, indent=4)
+        except Exception as e:
+            self.log(f"⚠️ Impossible de sauvegarder les cookies: {e}")
+    
+    def ensure_login(self):
+        """Réutilise les cookies sauvegardés, sinon se connecte.
+        
+        Les cookies ne sont pas vérifiés ici : une session expirée est
+        détectée à la première page reçue et request() se reconnecte.
+        """
+        if self.logged_in:
+            return True
+        if self.load_cookies():
+            self.log(f"✓ Session restaurée depuis {self.cookies_file}")
+            self.logged_in = True
+            return True
+        return self.login()
+    
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
     def login(self):
         """Se connecter au forum myBB"""
         try:
             # Récupère la page principale pour obtenir les cookies et le my_post_key
-            home_url = "https://ebdz.net/forum/index.php"
-            response = self.session.get(home_url)
+            home_url = urljoin(self.forum_root, 'index.php')
+            response = self.get(home_url, check_login=False)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Extrait le my_post_key du HTML
@@ -62,73 +1009,167 @@ class MyBBScraper:
             }
             
             # Envoie le formulaire de login
-            login_url = "https://ebdz.net/forum/member.php"
-            response = self.session.post(login_url, data=login_data, allow_redirects=True)
+            login_url = urljoin(self.forum_root, 'member.php')
+            response = self.request('POST', login_url, check_login=False, data=login_data, allow_redirects=True)
             
             # Vérifie si connecté
             if 'action=logout' in response.text or 'Déconnexion' in response.text:
-                print(f"✓ Connecté en tant que {self.username}")
+                self.log(f"✓ Connecté en tant que {self.username}")
                 self.logged_in = True
+                self.auth['generation'] += 1
+                self.auth['login_failed'] = False
+                self.save_cookies()
                 return True
             else:
-                print("✗ Échec de connexion - vérifie tes identifiants")
+                self.log("✗ Échec de connexion - vérifie tes identifiants")
                 return False
                 
         except Exception as e:
-            print(f"Erreur lors de la connexion: {e}")
+            self.log(f"Erreur lors de la connexion: {e}")
             import traceback
             traceback.print_exc()
             return False
     
     def extract_volume_number(self, filename):
-        """Extrait le numéro de volume depuis le nom de fichier"""
-        if not filename:
-            return None
-        
-        # Patterns pour détecter les numéros de volume
-        patterns = [
-            r'[Tt](\d{1,3})',           # T01, t12, T123
-            r'[Vv]ol\.?\s*(\d{1,3})',   # Vol.01, vol 12, Vol.123
-            r'[Vv](\d{1,3})',           # V01, v12
-            r'Volume\s*(\d{1,3})',      # Volume 01
-            r'Tome\s*(\d{1,3})',        # Tome 01
-            r'\s-\s(\d{1,3})\s',        # - 01 -
-            r'#(\d{1,3})',              # #01
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, filename, re.IGNORECASE)
-            if match:
-                volume = int(match.group(1))
-                return volume
-        
-        return None
+        """Extrait le numéro de volume depuis le nom de fichier (premier volume d'une plage)"""
+        return extract_volume_range(filename)[0]
+    
+    def refresh_statistics(self):
+        """Refait les statistiques du planificateur des tables qui ont beaucoup changé
+        (la migration d'une base neuve les a calculées sur des tables vides)"""
+        connection = self.connect_db()
+        if connection:
+            try:
+                analyzed = refresh_statistics(connection)
+            except sqlite3.OperationalError as e:
+                self.log(f"⚠️ Statistiques non mises à jour: {e}")
+                analyzed = []
+            finally:
+                connection.close()
+            if analyzed:
+                self.log(f"✓ Statistiques du planificateur mises à jour ({', '.join(analyzed)})")
     
     def create_table(self):
-        """Crée la table pour stocker les liens ed2k avec colonne volume"""
+        """Crée ou met à jour le schéma de la base (migrations de db_schema.py)"""
         connection = self.connect_db()
         if connection:
-            cursor = connection.cursor()
+            for version, description in migrate(connection):
+                self.log(f"✓ Migration {version} appliquée : {description}")
+            # Le mode WAL est enregistré dans le fichier : passé ici une fois, avant que
+            # plusieurs forums n'ouvrent leur LinkWriter en même temps (le changement
+            # de mode demande un accès exclusif)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.log(f"✓ Schéma de {os.path.basename(self.db_file)} en version {schema_version(connection)}")
+            connection.close()
+    
+    def load_thread_state(self):
+        """Charge la dernière activité connue de chaque thread déjà scrapé"""
+        connection = self.connect_db()
+        if not connection:
+            return {}
+        cursor = connection.cursor()
+        cursor.execute("SELECT thread_id, last_activity FROM thread_state")
+        state = dict(cursor.fetchall())
+        cursor.close()
+        connection.close()
+        return state
+    
+    def start_run(self, session_id, max_pages, resume=False):
+        """Ouvre l'entrée du journal de ce forum pour la session, ou reprend celle existante.
+        
+        Retourne None si le forum est déjà terminé dans cette session, sinon un
+        dict avec run_id, la page où reprendre le listing, les threads déjà
+        listés mais pas encore scrapés (ou en échec lors des runs terminés
+        du forum) et les URLs déjà vues.
+        """
+        connection = self.connect_db()
+        if not connection:
+            return None
+        cursor = connection.cursor()
+        journal = {'run_id': None, 'start_page': 1, 'pending': [], 'seen_urls': set(), 'listing_done': False}
+        
+        row = None
+        if resume:
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS ed2k_links (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    link TEXT NOT NULL UNIQUE,
-                    filename TEXT,
-                    filesize TEXT,
-                    volume INTEGER,
-                    thread_title TEXT,
-                    thread_url TEXT,
-                    thread_id TEXT,
-                    forum_category TEXT,
-                    cover_image TEXT,
-                    description TEXT,
-                    date_scraped TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                SELECT run_id, finished FROM scrape_runs
+                WHERE session_id = ? AND forum_url = ?
+                ORDER BY run_id DESC LIMIT 1
+            """, (session_id, self.base_url))
+            row = cursor.fetchone()
+        
+        if row and row[1]:
+            journal = None
+        elif row:
+            journal['run_id'] = row[0]
+            cursor.execute("SELECT page, has_next FROM scrape_run_pages WHERE run_id = ? ORDER BY page DESC LIMIT 1", (row[0],))
+            last_page = cursor.fetchone()
+            if last_page:
+                journal['start_page'] = last_page[0] + 1
+                journal['listing_done'] = not last_page[1]
+            cursor.execute("SELECT thread_url, thread_title, last_activity, done FROM scrape_run_threads WHERE run_id = ? ORDER BY page", (row[0],))
+            for thread_url, thread_title, last_activity, done in cursor.fetchall():
+                journal['seen_urls'].add(thread_url)
+                if not done:
+                    journal['pending'].append((thread_url, thread_title, last_activity))
+        else:
+            cursor.execute("""
+                INSERT INTO scrape_runs (session_id, forum_url, forum_category, max_pages) VALUES (?, ?, ?, ?)
+            """, (session_id, self.base_url, self.forum_category, max_pages))
+            journal['run_id'] = cursor.lastrowid
+            # Threads en échec des runs terminés de ce forum : repris en tête de ce run
+            cursor.execute("""
+                INSERT OR IGNORE INTO scrape_run_threads (run_id, thread_url, thread_title, last_activity, page)
+                SELECT ?, t.thread_url, t.thread_title, t.last_activity, t.page
+                FROM scrape_run_threads t JOIN scrape_runs r ON r.run_id = t.run_id
+                WHERE r.forum_url = ? AND r.finished IS NOT NULL AND t.done = 0
+                ORDER BY t.run_id, t.page
+            """, (journal['run_id'], self.base_url))
+            cursor.execute("""
+                DELETE FROM scrape_run_threads WHERE done = 0 AND run_id IN (
+                    SELECT run_id FROM scrape_runs WHERE forum_url = ? AND finished IS NOT NULL
                 )
-            """)
+            """, (self.base_url,))
+            cursor.execute("SELECT thread_url, thread_title, last_activity FROM scrape_run_threads WHERE run_id = ? ORDER BY page",
+                           (journal['run_id'],))
+            # Pas dans seen_urls : une page du listing faite de ces threads ne doit pas l'arrêter
+            journal['pending'].extend(cursor.fetchall())
             connection.commit()
-            cursor.close()
-            connection.close()
-            print("✓ Table créée/vérifiée dans edbz.db (avec colonne volume)")
+        
+        cursor.close()
+        connection.close()
+        return journal
+    
+    def _journaled_threads(self, pages, journal, writer):
+        """Déroule les threads des pages listées en inscrivant chaque page au journal"""
+        yield from journal['pending']
+        pending_urls = {thread[0] for thread in journal['pending']}
+        for page, page_threads, has_next in pages:
+            writer.record_page(journal['run_id'], page, page_threads, has_next)
+            yield from (thread for thread in page_threads if thread[0] not in pending_urls)
+    
+    def load_covers(self):
+        """Charge l'index des couvertures déjà téléchargées (url, empreinte, chemin)"""
+        connection = self.connect_db()
+        if not connection:
+            return []
+        cursor = connection.cursor()
+        cursor.execute("SELECT url, content_hash, path FROM covers")
+        covers = cursor.fetchall()
+        cursor.close()
+        connection.close()
+        return covers
+    
+    def open_writer(self):
+        """Ouvre un LinkWriter sur la base (None si la connexion échoue)"""
+        connection = self.connect_db()
+        if not connection:
+            return None
+        return LinkWriter(connection, self.batch_threads, self.batch_seconds, self.stats, log=self.log)
+    
+    def extract_thread_id(self, thread_url):
+        """Extrait le tid d'une URL de thread"""
+        tid_match = re.search(r'tid=(\d+)', thread_url)
+        return tid_match.group(1) if tid_match else ""
     
     def extract_ed2k_links(self, html):
         """Extrait les liens ed2k du HTML"""
@@ -137,20 +1178,100 @@ class MyBBScraper:
         return links
     
     def parse_ed2k_link(self, link):
-        """Parse un lien ed2k pour extraire infos"""
+        """Parse un lien ed2k : (nom, taille texte, taille en octets, hash MD4)"""
         parts = link.split('|')
         filename = parts[2] if len(parts) > 2 else None
         filesize = parts[3] if len(parts) > 3 else None
-        return filename, filesize
+        _, size, file_hash = ed2k.parse_link(link)
+        return filename, filesize, size, file_hash
     
     def get_thread_links(self, forum_url, max_pages=None):
         """Récupère tous les liens de threads du forum"""
         thread_links = []
-        seen_urls = set()
-        page = 1
+        for _, page_threads, _ in self.iter_forum_pages(forum_url, max_pages):
+            thread_links.extend((thread_url, thread_title) for thread_url, thread_title, _ in page_threads)
+        return thread_links
+    
+    def extract_thread_activity(self, soup):
+        """Extrait la dernière activité (réponses + dernier message) de chaque thread listé.
+        
+        Retourne un dict tid -> signature ; la signature change dès qu'un
+        message est posté dans le thread, mais pas quand MyBB remplace une
+        date relative ("Hier") par la date absolue.
+        """
+        replies = {}
+        for link in soup.find_all('a', href=re.compile(r'whoPosted\(\d+\)')):
+            tid = re.search(r'whoPosted\((\d+)\)', link['href']).group(1)
+            replies[tid] = link.get_text(strip=True)
+        
+        lastposts = {}
+        for span in soup.find_all('span', class_='lastpost'):
+            link = span.find('a', href=re.compile(r'tid=\d+'))
+            if link:
+                lastposts[self.extract_thread_id(link['href'])] = lastpost_signature(span)
+        
+        activity = {}
+        for tid in set(replies) | set(lastposts):
+            activity[tid] = f"{replies.get(tid, '')}|{lastposts.get(tid, '')}"
+        return activity
+    
+    def parse_forum_page(self, content, forum_url, page):
+        """Extrait d'une page de listing ses threads (url, titre, activité) et s'il y a une page suivante"""
+        soup = make_soup(content, self.parser, 'listing')
+        
+        # Trouve TOUS les liens qui contiennent showthread
+        all_thread_links = soup.find_all('a', href=re.compile(r'showthread\.php'))
+        
+        # Trouve les liens de threads myBB dans cette page
+        activity = self.extract_thread_activity(soup)
+        threads = []
+        seen_tids = set()
+        for link in all_thread_links:
+            href = link.get('href', '')
+            if 'tid=' in href:
+                thread_url = urljoin(forum_url.split('forumdisplay.php')[0], href)
+                # Nettoie l'URL (enlève les ancres et paramètres inutiles)
+                thread_url = thread_url.split('#')[0].split('&page=')[0]
+                thread_title = link.get_text(strip=True)
+                thread_id = self.extract_thread_id(thread_url)
+                
+                # Le premier lien d'un thread porte son titre ; les suivants
+                # ("Dernier message", pages du thread) renvoient au même thread
+                if thread_title and thread_id not in seen_tids:
+                    seen_tids.add(thread_id)
+                    threads.append((thread_url, thread_title, activity.get(thread_id)))
+        
+        # Vérifie s'il y a une page suivante - cherche plusieurs patterns
+        pagination = soup.find_all('a', class_='pagination_page')
+        
+        # Cherche le lien "next" ou le numéro de page suivant
+        has_next = False
+        for link in pagination:
+            if str(page + 1) in link.get_text():
+                has_next = True
+                break
+        
+        return threads, has_next
+    
+    def iter_forum_pages(self, forum_url, max_pages=None, known_activity=None, start_page=1, seen_urls=None):
+        """Parcourt les pages du forum et rend les threads de chaque page dès qu'elle est lue.
+        
+        Rend des tuples (page, threads, page suivante à lire ?), chaque thread
+        étant un tuple (url, titre, dernière activité). Si known_activity est
+        fourni (mode incrémental), les threads inchangés sont ignorés et le
+        listing s'arrête à la première page entièrement à jour.
+        """
+        total = 0
+        seen_urls = set() if seen_urls is None else seen_urls
+        page = start_page
         
         try:
             while True:
+                # Ctrl+C : arrête le listing au lieu de lire les pages jusqu'au bout
+                if self.stop_event.is_set():
+                    self.log(f"  Listing interrompu avant la page {page}")
+                    return
+                
                 # Construit l'URL de la page du forum (liste des threads)
                 if page == 1:
                     page_url = forum_url
@@ -161,61 +1282,99 @@ class MyBBScraper:
                     else:
                         page_url = f"{forum_url}?page={page}"
                 
-                print(f"  Lecture page {page} du forum...")
-                response = self.session.get(page_url)
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Trouve TOUS les liens qui contiennent showthread
-                all_thread_links = soup.find_all('a', href=re.compile(r'showthread\.php'))
+                self.log(f"  Lecture page {page} du forum...")
+                response = self.get(page_url)
+                response.raise_for_status()
+                with self.stats.stage('parse'):
+                    listed_threads, has_next = self.parse_forum_page(response.content, forum_url, page)
                 
-                # Trouve les liens de threads myBB dans cette page
+                # Garde les threads pas encore vus sur les pages précédentes
                 page_threads = []
-                for link in all_thread_links:
-                    href = link.get('href', '')
-                    if 'tid=' in href:
-                        thread_url = urljoin(forum_url.split('forumdisplay.php')[0], href)
-                        # Nettoie l'URL (enlève les ancres et paramètres inutiles)
-                        thread_url = thread_url.split('#')[0].split('&page=')[0]
-                        thread_title = link.get_text(strip=True)
-                        
-                        if thread_url not in seen_urls and thread_title:
-                            seen_urls.add(thread_url)
-                            page_threads.append((thread_url, thread_title))
+                for thread_url, thread_title, last_activity in listed_threads:
+                    if thread_url not in seen_urls:
+                        seen_urls.add(thread_url)
+                        page_threads.append((thread_url, thread_title, last_activity))
                 
                 if not page_threads:
                     break
                 
-                print(f"  → {len(page_threads)} threads trouvés sur cette page")
-                thread_links.extend(page_threads)
+                self.log(f"  → {len(page_threads)} threads trouvés sur cette page")
                 
+                if known_activity is not None:
+                    changed = [t for t in page_threads
+                               if t[2] is None or known_activity.get(self.extract_thread_id(t[0])) != t[2]]
+                    if not changed:
+                        self.log(f"  → Page {page} déjà à jour, arrêt du listing")
+                        break
+                    if len(changed) < len(page_threads):
+                        self.log(f"  → {len(page_threads) - len(changed)} threads inchangés ignorés")
+                    page_threads = changed
+
                 # Limite de pages pour les tests
-                if max_pages and page >= max_pages:
-                    print(f"  Limite de {max_pages} page(s) atteinte")
-                    break
+                limit_reached = bool(max_pages and page >= max_pages)
                 
-                # Vérifie s'il y a une page suivante - cherche plusieurs patterns
-                pagination = soup.find_all('a', class_='pagination_page')
+                total += len(page_threads)
+                yield page, page_threads, has_next and not limit_reached
                 
-                # Cherche le lien "next" ou le numéro de page suivant
-                has_next = False
-                for link in pagination:
-                    if str(page + 1) in link.get_text():
-                        has_next = True
-                        break
+                if limit_reached:
+                    self.log(f"  Limite de {max_pages} page(s) atteinte")
+                    break
                 
                 if not has_next:
                     break
                 
                 page += 1
-                time.sleep(0.5)  # Petite pause entre les pages
             
-            print(f"✓ {len(thread_links)} threads trouvés au total")
+            self.log(f"✓ {total} threads trouvés au total")
         except Exception as e:
-            print(f"Erreur lors du scraping du forum: {e}")
+            self.listing_error = True
+            self.log(f"Erreur lors du scraping du forum: {e}")
             import traceback
             traceback.print_exc()
+    
+    def stream_forum_pages(self, forum_url, max_pages=None, known_activity=None, start_page=1, seen_urls=None):
+        """Liste le forum dans un thread producteur et rend les pages au fil de l'eau.
         
-        return thread_links
+        Les pages lues passent par une file bornée (queue_size pages) : le
+        listing ne prend jamais plus de queue_size pages d'avance sur le scraping.
+        """
+        pages = queue.Queue(maxsize=self.queue_size)
+        done = object()
+        stop = threading.Event()
+        
+        def put(item):
+            # Ne bloque pas indéfiniment si le consommateur s'est arrêté
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for listed_page in self.iter_forum_pages(forum_url, max_pages, known_activity, start_page, seen_urls):
+                    if not put(listed_page):
+                        return
+            finally:
+                put(done)
+        
+        producer = threading.Thread(target=produce, name="forum-listing", daemon=True)
+        producer.start()
+        try:
+            while True:
+                listed_page = pages.get()
+                if listed_page is done:
+                    break
+                yield listed_page
+        finally:
+            stop.set()
+    
+    def _cover_lock(self, filename):
+        """Verrou propre à un fichier de couverture"""
+        with self._cover_locks_guard:
+            return self._cover_locks.setdefault(filename, threading.Lock())
     
     def download_cover(self, image_url):
         """Télécharge une couverture et retourne le chemin local"""
@@ -229,25 +1388,51 @@ class MyBBScraper:
             filename = f"{url_hash}{ext}"
             filepath = os.path.join('./data/covers', filename)
             
-            # Télécharge seulement si pas déjà présent
-            if not os.path.exists(filepath):
-                print(f"    Téléchargement de la couverture...")
-                response = self.session.get(image_url, timeout=10)
-                if response.status_code == 200:
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    print(f"    ✓ Couverture sauvegardée: {filename}")
-                    return f"covers/{filename}"
+            # Un seul worker télécharge une couverture donnée
+            with self._cover_lock(filename):
+                # Télécharge seulement si pas déjà présent
+                if not os.path.exists(filepath):
+                    self.log(f"    Téléchargement de la couverture...")
+                    with self.stats.stage('covers'):
+                        response = self.get(image_url, timeout=10)
+                    if response.status_code == 200:
+                        # Écrit dans un fichier temporaire pour ne jamais exposer une image partielle
+                        with open(filepath + '.part', 'wb') as f:
+                            f.write(response.content)
+                        os.replace(filepath + '.part', filepath)
+                        self.stats.add('covers')
+                        self.stats.add('cover_bytes', len(response.content))
+                        self.log(f"    ✓ Couverture sauvegardée: {filename}")
+                        return f"covers/{filename}"
+                    else:
+                        self.log(f"    ✗ Échec du téléchargement: HTTP {response.status_code}")
+                        return None
                 else:
-                    print(f"    ✗ Échec du téléchargement: HTTP {response.status_code}")
-                    return None
-            else:
-                print(f"    ✓ Couverture existe déjà: {filename}")
-                return f"covers/{filename}"
+                    self.log(f"    ✓ Couverture existe déjà: {filename}")
+                    return f"covers/{filename}"
         except Exception as e:
-            print(f"    ✗ Erreur téléchargement couverture: {e}")
+            self.log(f"    ✗ Erreur téléchargement couverture: {e}")
             return None
     
+    def parse_thread_page(self, content):
+        """Extrait l'URL de la couverture et la description d'une page de thread"""
+        soup = make_soup(content, self.parser, 'thread')
+        
+        cover_url = None
+        couv_li = soup.find('li', class_='couv')
+        if couv_li:
+            img_tag = couv_li.find('img')
+            if img_tag and img_tag.get('src'):
+                cover_url = img_tag['src']
+        
+        description = None
+        desc_p = soup.find('p', class_='indent')
+        if desc_p:
+            # Nettoie la description (enlève les balises <br />)
+            description = desc_p.get_text(separator=' ', strip=True)
+        
+        return cover_url, description
+    
     def scrape_thread(self, thread_url, thread_title):
         """Scrappe la première page d'un thread pour extraire les liens ed2k"""
         ed2k_data = []
@@ -257,45 +1442,47 @@ class MyBBScraper:
                 thread_url = thread_url.split('&page=')[0]
             
             # Extrait le thread_id de l'URL
-            thread_id = ""
-            tid_match = re.search(r'tid=(\d+)', thread_url)
-            if tid_match:
-                thread_id = tid_match.group(1)
+            thread_id = self.extract_thread_id(thread_url)
             
-            response = self.session.get(thread_url)
+            response = self.get(thread_url)
+            response.raise_for_status()
             html = response.text
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with self.stats.stage('parse'):
+                cover_url, description = self.parse_thread_page(response.content)
+                links = self.extract_ed2k_links(html)
             
             # Récupère la couverture
             cover_image = None
-            couv_li = soup.find('li', class_='couv')
-            if couv_li:
-                img_tag = couv_li.find('img')
-                if img_tag and img_tag.get('src'):
-                    cover_url = img_tag['src']
-                    print(f"  → Couverture trouvée: {cover_url[:60]}...")
+            if cover_url:
+                self.log(f"  → Couverture trouvée: {cover_url[:60]}...")
+                if self.covers:
+                    # Téléchargée en arrière-plan pendant un run, reportée en base à la fin
+                    cover_image = self.covers.request(cover_url, thread_id)
+                    if cover_image:
+                        self.log(f"    ✓ Couverture existe déjà: {os.path.basename(cover_image)}")
+                    else:
+                        self.log(f"    ⏳ Couverture en file de téléchargement")
+                else:
                     cover_image = self.download_cover(cover_url)
             
             # Récupère la description
-            description = None
-            desc_p = soup.find('p', class_='indent')
-            if desc_p:
-                # Nettoie la description (enlève les balises <br />)
-                description = desc_p.get_text(separator=' ', strip=True)
-                print(f"  → Description trouvée ({len(description)} caractères)")
+            if description is not None:
+                self.log(f"  → Description trouvée ({len(description)} caractères)")
             
-            links = self.extract_ed2k_links(html)
             for link in links:
-                filename, filesize = self.parse_ed2k_link(link)
+                filename, filesize, filesize_bytes, ed2k_hash = self.parse_ed2k_link(link)
                 
-                # Extrait le numéro de volume du nom de fichier
-                volume = self.extract_volume_number(filename)
+                # Extrait le numéro de volume (ou la plage de volumes) du nom de fichier
+                volume, volume_end = extract_volume_range(filename)
                 
                 ed2k_data.append({
                     'link': link,
                     'filename': filename,
                     'filesize': filesize,
+                    'filesize_bytes': filesize_bytes,
+                    'ed2k_hash': ed2k_hash,
                     'volume': volume,
+                    'volume_end': volume_end,
                     'thread_title': thread_title,
                     'thread_url': thread_url,
                     'thread_id': thread_id,
@@ -305,86 +1492,306 @@ class MyBBScraper:
                 })
             
             if links:
-                volumes_found = [str(d['volume']) for d in ed2k_data if d['volume'] is not None]
+                volumes_found = [f"{d['volume']}-{d['volume_end']}" if d['volume_end'] else str(d['volume'])
+                                 for d in ed2k_data if d['volume'] is not None]
                 volumes_info = f" (volumes: {', '.join(volumes_found)})" if volumes_found else ""
-                print(f"  → {len(links)} liens ed2k trouvés{volumes_info} dans: {thread_title[:50]}")
+                self.log(f"  → {len(links)} liens ed2k trouvés{volumes_info} dans: {thread_title[:50]}")
                 
         except Exception as e:
-            print(f"Erreur lors du scraping du thread: {e}")
+            self._local.failed = True
+            self.log(f"Erreur lors du scraping du thread: {e}")
         
         return ed2k_data
     
+    def _scrape_thread_buffered(self, thread_url, thread_title):
+        """Scrappe un thread dans un worker en capturant sa sortie.
+        
+        Retourne (liens, succès, sortie console).
+        """
+        self._local.buffer = []
+        self._local.failed = False
+        try:
+            ed2k_data = self.scrape_thread(thread_url, thread_title)
+            return ed2k_data, not self._local.failed, self._local.buffer
+        finally:
+            self._local.buffer = None
+    
+    def scrape_threads(self, thread_links):
+        """Scrappe les threads avec un pool de workers.
+        
+        Les résultats (et leur sortie console) sont rendus dans l'ordre de
+        thread_links, quel que soit le nombre de workers. Le nombre de threads
+        en cours est borné pour ne pas consommer tout l'itérable d'avance.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            try:
+                for item in thread_links:
+                    thread_url, thread_title = item[:2]
+                    future = executor.submit(self._scrape_thread_buffered, thread_url, thread_title)
+                    pending.append((item, future))
+                    if len(pending) >= self.workers * 2:
+                        item, future = pending.popleft()
+                        yield (item, *future.result())
+                while pending:
+                    item, future = pending.popleft()
+                    yield (item, *future.result())
+            finally:
+                # En cas d'interruption, n'attend que les threads déjà en cours
+                for _, future in pending:
+                    future.cancel()
+    
     def save_to_db(self, ed2k_data):
         """Sauvegarde les liens ed2k dans SQLite"""
-        connection = self.connect_db()
-        if not connection:
+        writer = self.open_writer()
+        if not writer:
             return
         
-        cursor = connection.cursor()
-        saved = 0
-        duplicates = 0
+        writer.add(ed2k_data)
+        writer.close()
         
-        for data in ed2k_data:
-            try:
-                cursor.execute("""
-                    INSERT INTO ed2k_links (link, filename, filesize, volume, thread_title, thread_url, thread_id, forum_category, cover_image, description)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (data['link'], data['filename'], data['filesize'], data['volume'],
-                      data['thread_title'], data['thread_url'], data['thread_id'], 
-                      data['forum_category'], data['cover_image'], data['description']))
-                saved += 1
-            except sqlite3.IntegrityError:
-                duplicates += 1
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
-        
-        print(f"✓ {saved} nouveaux liens sauvegardés, {duplicates} doublons ignorés")
+        self.log(f"✓ {writer.saved} nouveaux liens sauvegardés, {writer.duplicates} doublons ignorés")
     
-    def run(self, max_pages=None):
-        """Lance le scraping complet"""
-        print("=== Démarrage du scraper myBB ===\n")
+    def run(self, max_pages=None, session_id=None, resume=False):
+        """Lance le scraping complet.
         
-        # Connexion au forum
-        print("Connexion au forum...")
-        if not self.login():
-            print("Impossible de continuer sans connexion.")
-            return
+        Chaque page listée et chaque thread scrapé sont inscrits dans le journal
+        de la session : avec resume=True, un run interrompu reprend là où il
+        s'était arrêté, et un forum déjà terminé dans la session est ignoré.
+        """
+        self.log("=== Démarrage du scraper myBB ===\n")
+        self.stats = ScrapeStats(profile=bool(self.profile_dir))
+        
+        # Connexion au forum (déjà faite si la session est partagée)
+        if not self.logged_in:
+            self.log("Connexion au forum...")
+            with self.stats.stage('login'):
+                logged_in = self.ensure_login()
+            if not logged_in:
+                self.log("Impossible de continuer sans connexion.")
+                return
         
         # Crée la table
         self.create_table()
         
         # Récupère les threads
         if max_pages:
-            print(f"\nScraping du forum (limité à {max_pages} page(s)): {self.base_url}")
+            self.log(f"\nScraping du forum (limité à {max_pages} page(s)): {self.base_url}")
         else:
-            print(f"\nScraping du forum: {self.base_url}")
+            self.log(f"\nScraping du forum: {self.base_url}")
+        
+        # Journal du run (nouveau, ou repris si resume=True)
+        session_id = session_id or time.strftime('%Y%m%d-%H%M%S')
+        journal = self.start_run(session_id, max_pages, resume)
+        if journal is None:
+            self.log("✓ Forum déjà terminé dans cette session, ignoré.")
+            return
+        if resume and (journal['pending'] or journal['start_page'] > 1):
+            self.log(f"↻ Reprise du run {journal['run_id']} : {len(journal['pending'])} threads en attente, "
+                  f"listing à partir de la page {journal['start_page']}")
+        elif journal['pending']:
+            self.log(f"↻ {len(journal['pending'])} threads en échec au run précédent, repris en premier")
+        
+        # En mode incrémental, seuls les threads nouveaux ou modifiés sont scrapés
+        known_activity = None
+        if self.incremental:
+            known_activity = self.load_thread_state()
+            self.log(f"Mode incrémental : {len(known_activity)} threads déjà connus")
         
-        thread_links = self.get_thread_links(self.base_url, max_pages)
+        # Les liens sont sauvegardés par lots au fil du scraping
+        writer = self.open_writer()
+        if not writer:
+            self.log("Impossible de continuer sans base de données.")
+            return
+        
+        # Les couvertures sont téléchargées par une file séparée
+        self.covers = CoverDownloader(self.get, self.load_covers(), workers=self.cover_workers,
+                                      log=self.log, stats=self.stats)
+        
+        listing_args = (self.base_url, max_pages, known_activity, journal['start_page'], journal['seen_urls'])
+        self.listing_error = False
+        if journal['listing_done']:
+            pages = []
+        elif self.pipeline:
+            # Les threads sont scrapés pendant que le listing continue
+            pages = self.stream_forum_pages(*listing_args)
+        else:
+            pages = list(self.iter_forum_pages(*listing_args))
+        pending_urls = {thread[0] for thread in journal['pending']}
+        total_threads = None if self.pipeline else len(journal['pending']) + sum(
+            1 for p in pages for thread in p[1] if thread[0] not in pending_urls)
+        thread_links = self._journaled_threads(pages, journal, writer)
         
         # Scrappe chaque thread
-        print(f"\nScraping des threads...\n")
-        all_ed2k_data = []
+        self.log(f"\nScraping des threads...\n")
+        total_links = 0
         
-        for i, (thread_url, thread_title) in enumerate(thread_links, 1):
-            print(f"[{i}/{len(thread_links)}] {thread_title[:60]}...")
-            ed2k_data = self.scrape_thread(thread_url, thread_title)
-            all_ed2k_data.extend(ed2k_data)
-            time.sleep(1)  # Politesse envers le serveur
+        try:
+            results = self.scrape_threads(thread_links)
+            for i, ((thread_url, thread_title, last_activity), ed2k_data, ok, output) in enumerate(results, 1):
+                if self.stop_event.is_set():
+                    raise KeyboardInterrupt
+                progress = str(i) if total_threads is None else f"{i}/{total_threads}"
+                self.log(f"[{progress}] {thread_title[:60]}...")
+                for line in output:
+                    self.log(line)
+                total_links += len(ed2k_data)
+                self.stats.add('threads' if ok else 'threads_failed')
+                state = (self.extract_thread_id(thread_url), thread_url, last_activity) if ok else None
+                done = (journal['run_id'], thread_url) if ok else None
+                writer.add_covers(self.covers.drain())
+                writer.add(ed2k_data, state, done)
+            
+            # Attend les dernières couvertures avant de clore le run
+            writer.add_covers(self.covers.close())
+            
+            # Un listing interrompu (erreur, Ctrl+C) laisse le run ouvert pour --resume
+            if not self.listing_error and not self.stop_event.is_set():
+                writer.finish_run(journal['run_id'])
+        finally:
+            # Valide le dernier lot, même en cas d'interruption
+            writer.add_covers(self.covers.close(wait=False))
+            self.covers = None
+            writer.close()
         
-        # Sauvegarde dans la base
-        if all_ed2k_data:
-            print(f"\n=== Sauvegarde de {len(all_ed2k_data)} liens ===")
-            self.save_to_db(all_ed2k_data)
+        if self.analyze_after_run:
+            self.refresh_statistics()
+        
+        if total_links:
+            self.log(f"\n=== {total_links} liens trouvés, sauvegardés par lots ===")
+            self.log(f"✓ {writer.saved} nouveaux liens sauvegardés, {writer.duplicates} doublons ignorés")
         else:
-            print("\nAucun lien ed2k trouvé.")
+            self.log("\nAucun lien ed2k trouvé.")
+        
+        summary = self.stats.summary(forum_category=self.forum_category, forum_url=self.base_url)
+        self.log(f"\n📊 Statistiques du run ({summary['wall_seconds']}s, {summary['fetch']['requests']} requêtes, "
+                 f"{summary['fetch']['retries']} nouveaux essais) :")
+        self.log(json.dumps(summary, ensure_ascii=False, indent=2))
+        if self.profile_dir:
+            prefix = re.sub(r'\W+', '_', self.forum_category) or 'run'
+            for path in self.stats.dump_profiles(self.profile_dir, prefix):
+                self.log(f"  → Profil écrit: {path}")
         
-        print("\n=== Scraping terminé ===")
+        self.log("\n=== Scraping terminé ===")
+        return summary
+
+
+class MultiForumRunner:
+    """Scrape plusieurs forums avec un seul login et une seule session HTTP.
+    
+    Les cookies et le pool keep-alive sont partagés, et un seul limiteur par
+    hôte fixe le budget de politesse global : concurrent_forums forums sont
+    scrapés en même temps sans dépasser le débit courant vers le forum
+    (requests_per_second au départ, jusqu'à max_requests_per_second).
+    """
+    def __init__(self, forums, db_file, username, password, concurrent_forums=2,
+                 requests_per_second=1.0, max_requests_per_second=None, stats_file=None, **scraper_options):
+        self.forums = forums
+        self.stats_file = stats_file
+        self.db_file = db_file
+        self.username = username
+        self.password = password
+        self.concurrent_forums = max(1, concurrent_forums)
+        self.scraper_options = scraper_options
+        workers = scraper_options.get('workers', 1)
+        self.session = make_session(workers * self.concurrent_forums)
+        self.rate_limiter = HostRateLimiter(requests_per_second, max_rate=max_requests_per_second)
+        self.stop_event = threading.Event()
+    
+    def make_scraper(self, forum_config):
+        prefix = f"[{forum_config['category']}] " if self.concurrent_forums > 1 else ""
+        scraper = MyBBScraper(
+            forum_config['url'],
+            self.db_file,
+            self.username,
+            self.password,
+            forum_config['category'],
+            session=self.session,
+            rate_limiter=self.rate_limiter,
+            log_prefix=prefix,
+            **self.scraper_options
+        )
+        scraper.stop_event = self.stop_event
+        scraper.analyze_after_run = False
+        return scraper
+    
+    def _run_forum(self, scraper, forum_config, session_id, resume):
+        scraper.log(f"\n📂 Catégorie : {forum_config['category']}")
+        scraper.log(f"🔗 URL : {forum_config['url']}")
+        summary = scraper.run(max_pages=forum_config['max_pages'], session_id=session_id, resume=resume)
+        scraper.log("\n" + "-" * 60)
+        return summary
+    
+    def run(self, session_id, resume=False):
+        """Se connecte une fois puis scrape tous les forums"""
+        scrapers = [self.make_scraper(forum_config) for forum_config in self.forums]
+        if not scrapers:
+            return
+        
+        print("\nConnexion au forum...")
+        if not scrapers[0].ensure_login():
+            print("Impossible de continuer sans connexion.")
+            return
+        for scraper in scrapers:
+            scraper.logged_in = True
+            scraper.auth = scrapers[0].auth
+        
+        # Les tables sont créées une fois avant que les forums n'écrivent en parallèle
+        scrapers[0].create_table()
+        
+        with ThreadPoolExecutor(max_workers=self.concurrent_forums, thread_name_prefix='forum') as executor:
+            futures = [executor.submit(self._run_forum, scraper, forum_config, session_id, resume)
+                       for scraper, forum_config in zip(scrapers, self.forums)]
+            try:
+                # Une entrée par forum, dans l'ordre de la configuration : deux forums
+                # peuvent avoir la même catégorie (ou aucune). Chaque résumé porte
+                # forum_category et forum_url ; un run sans résumé garde au moins ceux-là.
+                summaries = [future.result() or {'forum_category': forum_config['category'],
+                                                 'forum_url': forum_config['url']}
+                             for forum_config, future in zip(self.forums, futures)]
+            except KeyboardInterrupt:
+                # Chaque forum valide son dernier lot avant de s'arrêter
+                self.stop_event.set()
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        # Un seul ANALYZE une fois tous les forums écrits
+        scrapers[0].refresh_statistics()
+        
+        # Statistiques de tous les forums, lisibles par un script
+        if self.stats_file:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump({'session_id': session_id, 'forums': summaries}, f, ensure_ascii=False, indent=2)
+            print(f"\n📊 Statistiques écrites dans {self.stats_file}")
+        return summaries
+
+
+def last_scrape_session(db_file):
+    """Retourne l'identifiant de la dernière session de scraping (None si aucune)"""
+    if not os.path.exists(db_file):
+        return None
+    connection = sqlite3.connect(db_file)
+    try:
+        row = connection.execute("SELECT session_id FROM scrape_runs ORDER BY run_id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        connection.close()
 
 
 # Configuration
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper ed2k EmuleBDZ")
+    parser.add_argument('--resume', action='store_true',
+                        help="reprend la dernière session interrompue sans refaire le travail déjà terminé")
+    parser.add_argument('--backfill-volumes', action='store_true',
+                        help="recalcule les volumes de tous les liens déjà en base, sans scraper")
+    parser.add_argument('--profile', metavar='DOSSIER',
+                        help="profile chaque étape (parse, couvertures, base...) avec cProfile dans DOSSIER")
+    args = parser.parse_args()
+    
     # Fichier de base de données SQLite dans ./data
     DB_FILE = "./data/edbz.db"
     
@@ -394,6 +1801,32 @@ if __name__ == "__main__":
     # Identifiants forum - À PERSONNALISER
     USERNAME = ""
     PASSWORD = ""
+    
+    # Cookies de connexion réutilisés d'un lancement à l'autre
+    COOKIES_FILE = "./data/cookies.json"
+    
+    # Statistiques JSON du dernier run (temps par étape, latences, débits)
+    STATS_FILE = "./data/last_run_stats.json"
+    
+    # Nombre de threads scrapés en parallèle et débit vers le forum :
+    # démarre à REQUESTS_PER_SECOND, remonte jusqu'à MAX_REQUESTS_PER_SECOND
+    # tant que le forum répond vite, ralentit dès qu'il sature (429/503, lenteur)
+    WORKERS = 4
+    REQUESTS_PER_SECOND = 2.0
+    MAX_REQUESTS_PER_SECOND = 5.0
+    
+    # Nombre de forums scrapés en même temps (même session, même budget de requêtes)
+    CONCURRENT_FORUMS = 2
+    
+    # Scrape les threads dès que leur page de listing est lue
+    PIPELINE = True
+    
+    # Ne re-scrape que les threads nouveaux ou modifiés depuis le dernier passage
+    INCREMENTAL = True
+    
+    # Parseur HTML : 'html.parser', 'lxml', 'strainer' ou 'lxml-strainer'
+    # (voir python -m bench.parsers pour comparer leurs performances)
+    PARSER = 'lxml-strainer'
    
     # ======= CONFIGURATION DES FORUMS À SCRAPER =======
     # Change facilement l'URL et le nom de catégorie ici
@@ -418,21 +1851,43 @@ if __name__ == "__main__":
     print("🚀 SCRAPER ED2K - EmuleBDZ")
     print("=" * 60)
     
-    for forum_config in FORUMS_TO_SCRAPE:
-        print(f"\n📂 Catégorie : {forum_config['category']}")
-        print(f"🔗 URL : {forum_config['url']}")
-        
-        scraper = MyBBScraper(
-            forum_config['url'], 
-            DB_FILE, 
-            USERNAME, 
-            PASSWORD,
-            forum_config['category']
-        )
-        
-        scraper.run(max_pages=forum_config['max_pages'])
-        
-        print("\n" + "-" * 60)
+    if args.backfill_volumes:
+        # Ajoute la colonne volume_end aux anciennes bases avant le recalcul
+        MyBBScraper(FORUMS_TO_SCRAPE[0]['url'], DB_FILE, USERNAME, PASSWORD).create_table()
+        backfill_volumes(DB_FILE)
+        sys.exit(0)
+    
+    # Tous les forums d'une exécution partagent la même session du journal
+    session_id = last_scrape_session(DB_FILE) if args.resume else None
+    if args.resume and not session_id:
+        print("\nAucune session à reprendre, démarrage d'une nouvelle session.")
+    if session_id:
+        print(f"\n↻ Reprise de la session {session_id}")
+    else:
+        session_id = time.strftime('%Y%m%d-%H%M%S')
+    
+    runner = MultiForumRunner(
+        FORUMS_TO_SCRAPE,
+        DB_FILE,
+        USERNAME,
+        PASSWORD,
+        concurrent_forums=CONCURRENT_FORUMS,
+        requests_per_second=REQUESTS_PER_SECOND,
+        max_requests_per_second=MAX_REQUESTS_PER_SECOND,
+        workers=WORKERS,
+        pipeline=PIPELINE,
+        incremental=INCREMENTAL,
+        parser=PARSER,
+        cookies_file=COOKIES_FILE,
+        stats_file=STATS_FILE,
+        profile_dir=args.profile
+    )
+    
+    try:
+        runner.run(session_id, resume=args.resume)
+    except KeyboardInterrupt:
+        print("\n\n⏸️  Scraping interrompu. Relance avec --resume pour reprendre là où il s'est arrêté.")
+        sys.exit(130)
     
     print("\n✅ Scraping terminé pour toutes les catégories !")
     print("=" * 60) 
@@ -1,9 +1,33 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
 import sqlite3
 import os
+import re
+import json
+import base64
+import gzip
+import hashlib
+import bisect
+import heapq
+import math
+import unicodedata
+import argparse
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+import pathlib
+from contextlib import contextmanager
+from db_schema import migrate_file, refresh_statistics_file, explain, plan_problems
+from ed2k import lookup_hash
 
 app = Flask(__name__)
 
+# Compression brotli si le module est installé, gzip sinon
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # Créer les répertoires nécessaires
 os.makedirs('./data/covers', exist_ok=True)
 os.makedirs('./templates', exist_ok=True)
@@ -107,63 +131,1129 @@ def save_emule_config():
 # Charge la config au démarrage
 load_emule_config()
 
-@app.route('/')
-def index():
+# Connexions en lecture seule réutilisées d'une requête à l'autre
+READ_POOL_SIZE = 8
+READ_PRAGMAS = (
+    "PRAGMA query_only = 1",
+    "PRAGMA mmap_size = 268435456",   # 256 Mo lus directement depuis le cache du système
+    "PRAGMA cache_size = -65536",     # 64 Mo de cache de pages par connexion
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+_read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+
+def open_read_connection():
+    """Ouvre une connexion en lecture seule (URI mode=ro) réglée pour la recherche"""
+    uri = pathlib.Path(DB_FILE).resolve().as_uri() + '?mode=ro'
+    connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    for pragma in READ_PRAGMAS:
+        connection.execute(pragma)
+    return connection
+
+@contextmanager
+def read_connection():
+    """Emprunte une connexion du pool (ou en ouvre une) et la rend après la requête.
+    
+    Le pool garde les connexions chaudes (cache de pages, mmap) ; la dernière
+    rendue est la première réutilisée.
+    """
+    try:
+        connection = _read_pool.get_nowait()
+    except queue.Empty:
+        connection = open_read_connection()
+    reuse = False
+    try:
+        yield connection
+        reuse = True
+    except sqlite3.DatabaseError:
+        # Connexion dans un état douteux : elle n'est pas remise dans le pool
+        raise
+    except BaseException:
+        # Autre erreur pendant la requête (saisie invalide, sérialisation...) :
+        # la connexion reste bonne si aucune transaction n'est restée ouverte
+        reuse = not connection.in_transaction
+        raise
+    finally:
+        # Toujours rendue au pool ou fermée, quelle que soit l'issue
+        if reuse:
+            try:
+                _read_pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+        else:
+            connection.close()
+
+# Génération de la base : augmente dès qu'une autre connexion (le scraper,
+# l'index plein texte...) valide une écriture. Sert à invalider les caches.
+_generation = {'value': 0, 'data_version': None, 'connection': None, 'lock': threading.Lock()}
+
+def db_generation():
+    """Génération courante de la base, lue via PRAGMA data_version sur une connexion dédiée"""
+    with _generation['lock']:
+        if _generation['connection'] is None:
+            _generation['connection'] = open_read_connection()
+        data_version = _generation['connection'].execute("PRAGMA data_version").fetchone()[0]
+        if data_version != _generation['data_version']:
+            _generation['data_version'] = data_version
+            _generation['value'] += 1
+        return _generation['value']
+
+# Chiffres de la page d'accueil, recalculés seulement quand la base a changé
+_dashboard_cache = {'generation': None, 'stats': None, 'lock': threading.Lock()}
+
+def dashboard_stats():
+    """Nombre de liens, de threads et liste des catégories (en cache jusqu'à la prochaine écriture)"""
+    generation = db_generation()
+    with _dashboard_cache['lock']:
+        if _dashboard_cache['generation'] == generation:
+            return _dashboard_cache['stats']
+        
+        with read_connection() as connection:
+            cursor = connection.cursor()
+            
+            # Compte total des liens
+            cursor.execute("SELECT COUNT(*) FROM ed2k_links")
+            total_links = cursor.fetchone()[0]
+            
+            # Compte total des threads uniques
+            cursor.execute("SELECT COUNT(*) FROM threads")
+            total_threads = cursor.fetchone()[0]
+            
+            # Récupère les catégories uniques
+            cursor.execute("SELECT DISTINCT forum_category FROM threads WHERE forum_category IS NOT NULL")
+            categories = [row[0] for row in cursor.fetchall()]
+        
+        stats = {'total_links': total_links, 'total_threads': total_threads, 'categories': categories}
+        _dashboard_cache['generation'] = generation
+        _dashboard_cache['stats'] = stats
+        return stats
+
+class QueryCache:
+    """Cache LRU des réponses de recherche, borné en taille et en durée.
+    
+    Chaque entrée est liée à la génération de la base : dès que le scraper
+    valide de nouvelles lignes, tout le cache est vidé.
+    """
+    def __init__(self, maxsize=512, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generation = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _check_generation(self, generation):
+        if generation != self.generation:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.generation = generation
+    
+    def get(self, key, generation):
+        """Réponse en cache pour key, ou None"""
+        with self.lock:
+            self._check_generation(generation)
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, generation, value):
+        with self.lock:
+            self._check_generation(generation)
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'generation': self.generation,
+            }
+
+search_cache = QueryCache()
+
+def enable_wal():
+    """Passe la base en mode WAL : les lectures ne bloquent plus pendant les écritures du scraper"""
     connection = sqlite3.connect(DB_FILE)
-    cursor = connection.cursor()
+    try:
+        mode = connection.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if mode != 'wal':
+            print(f"⚠️ Mode WAL indisponible (journal_mode={mode})")
+    finally:
+        connection.close()
+
+# Index plein texte (FTS5) sur le nom de fichier, le titre et la description :
+# insensible aux accents et à la ponctuation ("One.Piece" = "one piece")
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+FTS_ENABLED = False
+
+# Poids bm25 des colonnes indexées : filename, thread_title, description
+FTS_WEIGHTS = (5.0, 10.0, 1.0)
+
+def fts5_available():
+    """Vrai si SQLite est compilé avec FTS5 et supporte remove_diacritics 2"""
+    try:
+        connection = sqlite3.connect(':memory:')
+        connection.execute(f"CREATE VIRTUAL TABLE t USING fts5(x, tokenize='{FTS_TOKENIZER}')")
+        connection.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def create_fts(connection):
+    """Crée l'index ed2k_fts et les triggers qui le synchronisent avec ed2k_links et threads.
     
-    # Compte total des liens
-    cursor.execute("SELECT COUNT(*) FROM ed2k_links")
-    total_links = cursor.fetchone()[0]
+    L'index a pour contenu externe la vue ed2k_search (chaque lien avec le
+    titre et la description de son thread) ; modifier le titre ou la
+    description d'un thread réindexe tous ses liens.
+    Retourne True si l'index vient d'être créé (il faut alors le remplir).
+    """
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ed2k_fts'"
+    ).fetchone()
+    connection.executescript(f"""
+        CREATE VIEW IF NOT EXISTS ed2k_search AS
+            SELECT l.id, l.filename, t.thread_title, t.description
+            FROM ed2k_links l LEFT JOIN threads t ON t.thread_id = l.thread_id;
+        CREATE VIRTUAL TABLE IF NOT EXISTS ed2k_fts USING fts5(
+            filename, thread_title, description,
+            content='ed2k_search', content_rowid='id',
+            tokenize='{FTS_TOKENIZER}'
+        );
+        CREATE TRIGGER IF NOT EXISTS ed2k_links_fts_insert AFTER INSERT ON ed2k_links BEGIN
+            INSERT INTO ed2k_fts(rowid, filename, thread_title, description)
+            SELECT new.id, new.filename, thread_title, description FROM ed2k_search WHERE id = new.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS ed2k_links_fts_delete AFTER DELETE ON ed2k_links BEGIN
+            INSERT INTO ed2k_fts(ed2k_fts, rowid, filename, thread_title, description)
+            SELECT 'delete', old.id, old.filename, thread_title, description
+            FROM (SELECT NULL) LEFT JOIN threads ON thread_id = old.thread_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS ed2k_links_fts_update
+        AFTER UPDATE OF filename, thread_id ON ed2k_links BEGIN
+            INSERT INTO ed2k_fts(ed2k_fts, rowid, filename, thread_title, description)
+            SELECT 'delete', old.id, old.filename, thread_title, description
+            FROM (SELECT NULL) LEFT JOIN threads ON thread_id = old.thread_id;
+            INSERT INTO ed2k_fts(rowid, filename, thread_title, description)
+            SELECT new.id, new.filename, thread_title, description FROM ed2k_search WHERE id = new.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS threads_fts_update
+        AFTER UPDATE OF thread_title, description ON threads
+        WHEN old.thread_title IS NOT new.thread_title OR old.description IS NOT new.description BEGIN
+            INSERT INTO ed2k_fts(ed2k_fts, rowid, filename, thread_title, description)
+            SELECT 'delete', id, filename, old.thread_title, old.description
+            FROM ed2k_links WHERE thread_id = old.thread_id;
+            INSERT INTO ed2k_fts(rowid, filename, thread_title, description)
+            SELECT id, filename, new.thread_title, new.description
+            FROM ed2k_links WHERE thread_id = new.thread_id;
+        END;
+    """)
+    return not exists
+
+def rebuild_fts(connection):
+    """Reconstruit entièrement l'index plein texte depuis ed2k_links et threads"""
+    with connection:
+        connection.execute("INSERT INTO ed2k_fts(ed2k_fts) VALUES ('rebuild')")
+
+def init_fts(rebuild=False):
+    """Prépare l'index plein texte au démarrage ; la recherche repasse en LIKE s'il est indisponible"""
+    global FTS_ENABLED
+    if not fts5_available():
+        print("⚠️ SQLite sans FTS5 : recherche en LIKE (plus lente).")
+        FTS_ENABLED = False
+        return False
+    connection = sqlite3.connect(DB_FILE)
+    try:
+        created = create_fts(connection)
+        if created or rebuild:
+            print("🔄 Construction de l'index de recherche plein texte...")
+            rebuild_fts(connection)
+            count = connection.execute("SELECT COUNT(*) FROM ed2k_links").fetchone()[0]
+            print(f"✓ Index plein texte construit ({count} liens)")
+        FTS_ENABLED = True
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Index plein texte indisponible ({e}) : recherche en LIKE.")
+        FTS_ENABLED = False
+    finally:
+        connection.close()
+    return FTS_ENABLED
+
+def fts_query(query):
+    """Transforme la saisie en requête FTS5 : chaque mot est un préfixe, tous sont requis.
+    
+    Retourne None si la saisie ne contient aucun mot indexable.
+    """
+    tokens = re.findall(r'\w+', query)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def normalize_text(text):
+    """Minuscules, sans accents ni ponctuation (L'Attaque des Titans -> l attaque des titans)"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ' '.join(re.findall(r'[^\W_]+', text))
+
+def trigrams(text):
+    """Trigrammes de chaque mot, bordés d'espaces comme pg_trgm ("bal" -> "  b", " ba", "bal", "al ")"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+# Recherche approchée : part minimale des trigrammes de la saisie présents dans le titre,
+# et nombre maximal de titres retenus
+FUZZY_THRESHOLD = 0.5
+FUZZY_TITLES = 50
+
+class TitleIndex:
+    """Index en mémoire des titres de séries distincts, pour l'autocomplétion.
+    
+    Chaque titre normalisé est rangé sous tous ses suffixes qui commencent
+    un mot ("one piece" sous "one piece" et "piece") dans une liste triée :
+    une saisie est cherchée par bisect, quel que soit le mot tapé.
     
-    # Compte total des threads uniques
-    cursor.execute("SELECT COUNT(DISTINCT thread_id) FROM ed2k_links")
-    total_threads = cursor.fetchone()[0]
+    Les trigrammes de chaque titre alimentent aussi la recherche approchée
+    (fautes de frappe : "berserck", "dragon bal").
+    """
+    def __init__(self, rows):
+        # rows : (thread_title, nombre de liens, nombre de threads)
+        self.titles = []
+        self.links = []
+        self.threads = []
+        self.trigrams = {}
+        self.trigram_counts = []
+        entries = []
+        for title, links, threads in rows:
+            normalized = normalize_text(title)
+            if not normalized:
+                continue
+            title_id = len(self.titles)
+            self.titles.append(title)
+            self.links.append(links)
+            self.threads.append(threads)
+            grams = trigrams(normalized)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigrams.setdefault(gram, set()).add(title_id)
+            for match in re.finditer(r'\S+', normalized):
+                entries.append((normalized[match.start():], title_id))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ids = [title_id for _, title_id in entries]
     
-    # Récupère les catégories uniques
-    cursor.execute("SELECT DISTINCT forum_category FROM ed2k_links WHERE forum_category IS NOT NULL")
-    categories = [row[0] for row in cursor.fetchall()]
+    @classmethod
+    def load(cls, connection):
+        cursor = connection.execute("""
+            SELECT t.thread_title, COUNT(*), COUNT(DISTINCT t.thread_id)
+            FROM threads t JOIN ed2k_links l ON l.thread_id = t.thread_id
+            WHERE t.thread_title IS NOT NULL
+            GROUP BY t.thread_title
+        """)
+        return cls(cursor.fetchall())
     
-    connection.close()
+    def suggest(self, text, limit=10):
+        """Les titres dont un mot commence par la saisie, les plus fournis en liens d'abord"""
+        prefix = normalize_text(text)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+        title_ids = set(self.ids[start:end])
+        best = heapq.nsmallest(limit, title_ids, key=lambda i: (-self.links[i], self.titles[i]))
+        return [{'title': self.titles[i], 'links': self.links[i], 'threads': self.threads[i]} for i in best]
     
+    def similar(self, text, limit=FUZZY_TITLES, threshold=FUZZY_THRESHOLD):
+        """Titres proches de la saisie, du plus ressemblant au moins ressemblant.
+        
+        Score : part des trigrammes de la saisie présents dans le titre ; à score
+        égal, le titre le plus court (indice de Jaccard) puis le plus fourni passe devant.
+        Retourne [(titre, score)].
+        """
+        grams = trigrams(normalize_text(text))
+        if not grams:
+            return []
+        needed = threshold * len(grams)
+        # Un titre qui partage assez de trigrammes en a au moins un parmi les plus rares
+        # de la saisie : seuls ceux-là fournissent les candidats, les trigrammes courants
+        # ("tom", "int"...) ne font que compléter leur compte
+        postings = sorted((self.trigrams.get(gram, ()) for gram in grams), key=len)
+        prefix = len(grams) - math.ceil(needed) + 1
+        hits = Counter()
+        for posting in postings[:prefix]:
+            hits.update(posting)
+        for posting in postings[prefix:]:
+            hits.update(hits.keys() & posting)
+        scored = []
+        for title_id, shared in hits.items():
+            if shared < needed:
+                continue
+            jaccard = shared / (len(grams) + self.trigram_counts[title_id] - shared)
+            scored.append((shared / len(grams), jaccard, self.links[title_id], -title_id))
+        best = heapq.nlargest(limit, scored)
+        return [(self.titles[-title_id], round(score, 3)) for score, _, _, title_id in best]
+
+# Index des titres, reconstruit en arrière-plan quand la base change ; building
+# n'est lu et modifié que sous le verrou, qui protège aussi l'échange de l'index
+_title_index = {'index': None, 'generation': None, 'building': False, 'lock': threading.Lock()}
+_title_index['built'] = threading.Condition(_title_index['lock'])
+
+def _build_title_index(generation):
+    """Construit l'index des titres (building a été mis par l'appelant sous le verrou)"""
+    index = None
+    try:
+        with read_connection() as connection:
+            index = TitleIndex.load(connection)
+    finally:
+        with _title_index['lock']:
+            if index is not None:
+                _title_index['index'] = index
+                _title_index['generation'] = generation
+            _title_index['building'] = False
+            _title_index['built'].notify_all()
+
+def title_index():
+    """Index des titres à jour ; pendant une reconstruction, l'ancien index reste servi"""
+    generation = db_generation()
+    with _title_index['lock']:
+        index = _title_index['index']
+        if _title_index['generation'] != generation and not _title_index['building']:
+            _title_index['building'] = True
+            if index is not None:
+                threading.Thread(target=_build_title_index, args=(generation,), daemon=True).start()
+                return index
+        elif index is not None:
+            return index
+        else:
+            # Premier index en cours de construction par une autre requête : il est attendu
+            _title_index['built'].wait_for(lambda: not _title_index['building'])
+            return _title_index['index']
+    # Premier appel : construit l'index tout de suite
+    _build_title_index(generation)
+    return _title_index['index']
+
+@app.route('/')
+def index():
+    stats = dashboard_stats()
     return render_template('index.html', 
-                         total_links=total_links,
-                         total_threads=total_threads,
-                         categories=categories)
+                         total_links=stats['total_links'],
+                         total_threads=stats['total_threads'],
+                         categories=stats['categories'])
 
-@app.route('/api/search')
-def search():
-    query = request.args.get('query', '')
-    volume = request.args.get('volume', '')
-    category = request.args.get('category', '')
+# Format groupé : champs communs d'un thread, et champs de chaque lien (tableau compact)
+THREAD_FIELDS = ('thread_id', 'thread_title', 'thread_url', 'forum_category', 'cover_image', 'description')
+LINK_FIELDS = ('id', 'link', 'filename', 'filesize', 'volume', 'volume_end')
+
+# Colonnes renvoyées par /api/search (date_scraped et les colonnes internes ne servent pas à l'interface)
+RESULT_COLUMNS = LINK_FIELDS + THREAD_FIELDS
+
+# Les requêtes de recherche ne lisent que les liens ; les infos de leurs threads
+# sont lues ensuite, une fois par thread de la page (fetch_threads)
+LINK_COLUMNS = ', '.join(f'l.{field}' for field in LINK_FIELDS + ('thread_id',))
+
+# Taille des pages de résultats, et plafond du comptage renvoyé avec la première page
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+COUNT_CAP = 10000
+
+# Ordre des résultats de chaque mode ; id départage les lignes identiques
+LIKE_ORDER = ('thread_title', 'thread_id', 'volume', 'filename', 'id')
+FTS_ORDER = ('thread_score', 'thread_id', 'volume', 'filename', 'id')
+FUZZY_ORDER = ('title_rank', 'thread_id', 'volume', 'filename', 'id')
+
+SEARCH_ORDERS = {'like': LIKE_ORDER, 'fts': FTS_ORDER, 'fuzzy': FUZZY_ORDER}
+
+def search_filters(volume, category):
+    """Conditions SQL communes aux modes de recherche (liens l, threads t)"""
+    sql = ""
+    params = []
+    if volume:
+        # Un fichier "T01-05" correspond aux volumes 1 à 5 ; volume est un numéro
+        # ou une plage (début, fin) qui doit recouper celle du fichier : son premier
+        # volume est dans la plage, ou il commence avant et finit dedans ou après.
+        # Deux plages bornées (idx_ed2k_links_volume, idx_ed2k_links_volume_range)
+        # plutôt que tous les liens des volumes inférieurs
+        start, stop = volume if isinstance(volume, tuple) else (volume, volume)
+        sql += " AND (l.volume BETWEEN ? AND ? OR (l.volume_end >= ? AND l.volume < ?))"
+        params.extend([int(start), int(stop), int(start), int(start)])
+    if category:
+        sql += " AND t.forum_category = ?"
+        params.append(category)
+    return sql, params
+
+def fts_base_query(match, volume, category):
+    """Requête plein texte classée par bm25.
     
-    connection = sqlite3.connect(DB_FILE)
-    connection.row_factory = sqlite3.Row
-    cursor = connection.cursor()
+    Les threads sont triés par le score de leur meilleur lien (thread_score),
+    et les liens d'un même thread restent dans l'ordre des volumes.
+    """
+    filters, params = search_filters(volume, category)
+    sql = f"""
+        WITH matches AS (
+            SELECT rowid, bm25(ed2k_fts, {', '.join(map(str, FTS_WEIGHTS))}) AS score
+            FROM ed2k_fts WHERE ed2k_fts MATCH ?
+        )
+        SELECT {LINK_COLUMNS}, MIN(m.score) OVER (PARTITION BY l.thread_id) AS thread_score
+        FROM matches m
+        JOIN ed2k_links l ON l.id = m.rowid
+        {'JOIN threads t ON t.thread_id = l.thread_id' if category else ''}
+        WHERE 1=1{filters}
+    """
+    return sql, [match] + params
+
+def fuzzy_base_query(titles, volume, category):
+    """Liens des titres trouvés par la recherche approchée, dans l'ordre de ressemblance"""
+    filters, params = search_filters(volume, category)
+    # Sans titre proche, une ligne NULL ne correspond à aucun lien
+    ranks = ', '.join('(?, ?)' for _ in titles) or '(NULL, NULL)'
+    sql = f"""
+        WITH fuzzy(title_rank, title) AS (VALUES {ranks})
+        SELECT {LINK_COLUMNS}, f.title_rank
+        FROM fuzzy f
+        JOIN threads t ON t.thread_title = f.title
+        JOIN ed2k_links l ON l.thread_id = t.thread_id
+        WHERE 1=1{filters}
+    """
+    ranked = [value for rank, title in enumerate(titles) for value in (rank, title)]
+    return sql, ranked + params
+
+def like_base_query(query, volume, category):
+    """Requête par LIKE (sans index plein texte).
     
-    sql = "SELECT * FROM ed2k_links WHERE 1=1"
+    Les threads sont lus dans l'ordre des titres (CROSS JOIN fixe l'ordre des
+    tables) et leurs liens par idx_ed2k_links_thread : la page s'arrête au LIMIT,
+    sans trier tous les liens d'un volume courant.
+    """
+    sql = f"SELECT {LINK_COLUMNS}, t.thread_title FROM threads t CROSS JOIN ed2k_links l ON l.thread_id = t.thread_id WHERE 1=1"
     params = []
     
     if query:
-        sql += " AND (filename LIKE ? OR thread_title LIKE ?)"
+        sql += " AND (l.filename LIKE ? OR t.thread_title LIKE ?)"
         search_term = f"%{query}%"
         params.extend([search_term, search_term])
     
-    if volume:
-        sql += " AND volume = ?"
-        params.append(int(volume))
+    filters, filter_params = search_filters(volume, category)
+    return sql + filters, params + filter_params
+
+def link_count_query(volume):
+    """Liens d'un volume, sans autre critère : comptés sur les seuls index des volumes"""
+    filters, params = search_filters(volume, '')
+    return f"SELECT l.id FROM ed2k_links l WHERE 1=1{filters}", params
+
+def search_count_query(mode, text, volume, category, base_sql, params):
+    """Requête dont les lignes donnent le total d'une recherche : sans texte ni
+    catégorie, les liens du volume sont comptés sur ed2k_links seule"""
+    if mode == 'like' and volume and not text and not category:
+        return link_count_query(volume)
+    return base_sql, params
+
+def count_query(base_sql, params):
+    """Nombre de lignes de base_sql, plafonné à COUNT_CAP"""
+    return f"SELECT COUNT(*) FROM (SELECT 1 FROM ({base_sql}) LIMIT ?)", params + [COUNT_CAP]
+
+def search_mode(query, fuzzy=False):
+    """Mode de recherche d'une saisie et texte envoyé à SQL : (mode, texte)"""
+    if fuzzy and query:
+        # Titres proches malgré les fautes de frappe, puis leurs liens
+        return 'fuzzy', normalize_text(query)
+    # FTS5 ignore la casse : la requête en minuscules donne les mêmes résultats
+    match = fts_query(query.lower()) if query and FTS_ENABLED else None
+    if match:
+        return 'fts', match
+    return 'like', query
+
+def search_base_query(mode, text, volume, category):
+    """Requête de base d'un mode de recherche ; text est la requête FTS, la saisie
+    normalisée (fuzzy) ou la saisie telle quelle (like)"""
+    if mode == 'fuzzy':
+        index = title_index()
+        titles = [title for title, _ in index.similar(text)] if index else []
+        return fuzzy_base_query(titles, volume, category)
+    if mode == 'fts':
+        return fts_base_query(text, volume, category)
+    return like_base_query(text, volume, category)
+
+def keyset_condition(columns, values):
+    """Condition « strictement après values » dans l'ordre ORDER BY columns.
     
-    if category:
-        sql += " AND forum_category = ?"
-        params.append(category)
+    Tient compte des NULL, que SQLite trie en premier : après NULL viennent
+    les valeurs non NULL, et rien ne vient après une valeur dans les NULL.
+    """
+    alternatives = []
+    params = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        terms = []
+        for previous, previous_value in zip(columns[:i], values[:i]):
+            terms.append(f"{previous} IS ?")
+            params.append(previous_value)
+        if value is None:
+            terms.append(f"{column} IS NOT NULL")
+        else:
+            terms.append(f"{column} > ?")
+            params.append(value)
+        alternatives.append("(" + " AND ".join(terms) + ")")
+    condition = "(" + " OR ".join(alternatives) + ")"
+    if values[0] is not None:
+        # Borne sur la première colonne : permet de reprendre l'index à la bonne place
+        condition = f"({columns[0]} >= ? AND {condition})"
+        params.insert(0, values[0])
+    return condition, params
+
+def encode_cursor(mode, values):
+    payload = json.dumps({'m': mode, 'k': list(values)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _cursor_payload(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        payload['k']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("curseur illisible")
+    return payload
+
+def cursor_mode(cursor):
+    """Mode de recherche ('like', 'fts', 'fuzzy') qui a produit le curseur"""
+    return _cursor_payload(cursor).get('m')
+
+def decode_cursor(cursor, mode, size):
+    """Valeurs de tri encodées dans le curseur ; ValueError si le curseur ne correspond pas"""
+    payload = _cursor_payload(cursor)
+    values = payload['k']
+    if payload.get('m') != mode or not isinstance(values, list) or len(values) != size:
+        raise ValueError("curseur d'une autre recherche")
+    return values
+
+def page_query(base_sql, params, order, after, limit):
+    """Requête d'une page : les lignes de base_sql après le curseur, dans l'ordre order"""
+    keyset, keyset_params = keyset_condition(order, after) if after else ("1=1", [])
+    sql = f"""
+        SELECT * FROM ({base_sql}) WHERE {keyset}
+        ORDER BY {', '.join(order)} LIMIT ?
+    """
+    return sql, params + keyset_params + [limit]
+
+def search_page(cursor, mode, base_sql, params, order, after, limit, count=None):
+    """Une page de résultats après le curseur, par pagination sur les clés de tri (keyset).
     
-    sql += " ORDER BY thread_title, volume, filename"
+    count : (requête, paramètres) plus légère dont les lignes sont comptées à la
+    place de base_sql. Retourne (résultats, curseur suivant ou None, total approché ou None).
+    """
+    cursor.execute(*page_query(base_sql, params, order, after, limit + 1))
+    rows = cursor.fetchall()
     
-    cursor.execute(sql, params)
-    results = [dict(row) for row in cursor.fetchall()]
-    connection.close()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(mode, [rows[-1][column] for column in order])
     
-    return jsonify({'results': results})
+    # Comptage plafonné, seulement avec la première page
+    total = None
+    if after is None:
+        cursor.execute(*count_query(*(count or (base_sql, params))))
+        total = cursor.fetchone()[0]
+    
+    threads = fetch_threads(cursor, {row['thread_id'] for row in rows})
+    results = []
+    previous_thread = None
+    for row in rows:
+        result = link_result(row, threads)
+        # La description n'est envoyée qu'une fois par thread et par page
+        if result['thread_id'] == previous_thread:
+            result['description'] = None
+        previous_thread = result['thread_id']
+        results.append(result)
+    return results, next_cursor, total
+
+def link_result(row, threads):
+    """Un résultat : les champs du lien et ceux de son thread (lus par fetch_threads)"""
+    result = {field: row[field] for field in LINK_FIELDS}
+    thread = threads.get(row['thread_id']) or {'thread_id': row['thread_id']}
+    result.update({field: thread.get(field) for field in THREAD_FIELDS})
+    return result
+
+def fetch_threads(cursor, thread_ids):
+    """Infos des threads d'une page de résultats, en une requête : {thread_id: champs}"""
+    if not thread_ids:
+        return {}
+    thread_ids = list(thread_ids)
+    cursor.execute(f"""
+        SELECT {', '.join(THREAD_FIELDS)} FROM threads
+        WHERE thread_id IN ({', '.join('?' for _ in thread_ids)})
+    """, thread_ids)
+    return {row['thread_id']: {field: row[field] for field in THREAD_FIELDS} for row in cursor.fetchall()}
+
+def group_results(results):
+    """Regroupe les liens par thread : les infos du thread une fois, puis ses liens en tableaux"""
+    threads = []
+    by_id = {}
+    for result in results:
+        thread = by_id.get(result['thread_id'])
+        if thread is None:
+            thread = {field: result[field] for field in THREAD_FIELDS}
+            thread['links'] = []
+            by_id[result['thread_id']] = thread
+            threads.append(thread)
+        thread['links'].append([result[field] for field in LINK_FIELDS])
+    return threads
+
+def json_body(payload):
+    """Corps JSON compact et son empreinte (ETag faible)"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest()[:20]
+
+def conditional_json(body, etag):
+    """Réponse JSON avec ETag : 304 sans corps si le client a déjà cette version"""
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    # Le navigateur garde la réponse mais revalide à chaque fois
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.after_request
+def compress_response(response):
+    """Compresse les réponses texte (brotli ou gzip selon Accept-Encoding)"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in ('application/json', 'text/html', 'text/css', 'application/javascript')):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < 1024:
+        return response
+    accepted = request.accept_encodings
+    if brotli and accepted['br']:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif accepted['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def check_query_plans():
+    """Affiche le plan (EXPLAIN QUERY PLAN) des requêtes de recherche et de la page d'accueil.
+    
+    Signale les parcours de ed2k_links ou threads qui ne sont pas voulus, les tris
+    temporaires évitables et les index attendus que le planificateur n'utilise pas.
+    Retourne le nombre de requêtes qui en contiennent.
+    """
+    after_like = ('One Piece', '1234', 3, 'One Piece T03.cbz', 1000)
+    page = DEFAULT_LIMIT + 1
+    by_title = ('idx_threads_title', 'idx_ed2k_links_thread')
+    # (libellé, requête, tri toléré, parcours complets voulus, index attendus) ;
+    # LIKE '%...%' lit forcément tous les titres : dans l'ordre de l'index, jusqu'au LIMIT
+    checks = [
+        ("Recherche LIKE", page_query(*like_base_query('piece', None, ''), LIKE_ORDER, None, page),
+         False, ('t',), by_title),
+        ("Recherche LIKE, page suivante",
+         page_query(*like_base_query('piece', None, ''), LIKE_ORDER, after_like, page), False, (), by_title),
+        ("Recherche LIKE par catégorie",
+         page_query(*like_base_query('piece', None, 'Mangas'), LIKE_ORDER, None, page),
+         False, (), ('idx_threads_category', 'idx_ed2k_links_thread')),
+        ("Recherche par volume", page_query(*like_base_query('', 3, ''), LIKE_ORDER, None, page),
+         False, ('t',), by_title),
+        ("Recherche par volume, comptage", count_query(*link_count_query(3)),
+         False, (), ('idx_ed2k_links_volume', 'idx_ed2k_links_volume_range')),
+        ("Recherche approchée",
+         page_query(*fuzzy_base_query(['One Piece', 'Dragon Ball'], None, ''), FUZZY_ORDER, None, page),
+         True, (), by_title),
+        ("Recherche groupée approchée",
+         batch_query('fuzzy', [(0, ['One Piece', 'Naruto'], None, ''), (1, ['Berserk'], (3, 5), 'Mangas')],
+                     BATCH_FUZZY_LIMIT + 1),
+         True, (), by_title),
+        ("Recherche par hash ed2k", (lookup_query(2), ['0' * 32, 'F' * 32]), False, (), ('idx_ed2k_links_hash',)),
+        ("Nombre de threads", ("SELECT COUNT(*) FROM threads", []), False, ('threads',), ()),
+        ("Catégories", ("SELECT DISTINCT forum_category FROM threads WHERE forum_category IS NOT NULL", []),
+         False, (), ('idx_threads_category',)),
+    ]
+    if FTS_ENABLED:
+        # Le classement bm25 trie forcément les résultats : seul le parcours compte
+        checks.append(("Recherche plein texte",
+                       page_query(*fts_base_query(fts_query('one piece'), None, ''), FTS_ORDER, None, page),
+                       True, (), ()))
+        checks.append(("Recherche groupée plein texte",
+                       batch_query('fts', [(0, fts_query('one piece'), None, ''), (1, fts_query('berserk'), (3, 5), 'Mangas')],
+                                   BATCH_ITEM_LIMIT + 1),
+                       True, (), ()))
+    
+    problems = 0
+    with read_connection() as connection:
+        for label, (sql, params), allow_sort, full_scans, indexes in checks:
+            plan = explain(connection, sql, params)
+            issues = plan_problems(plan, tables=('ed2k_links', 'l', 'threads', 't'), allow_sort=allow_sort,
+                                   full_scans=full_scans, indexes=indexes)
+            print(f"{'⚠️' if issues else '✓'} {label}")
+            for detail in plan:
+                print(f"    {'→ ' if detail in issues else ''}{detail}")
+            for issue in issues:
+                if issue not in plan:
+                    print(f"    → {issue}")
+            problems += bool(issues)
+    return problems
+
+@app.route('/api/search')
+def search():
+    # La saisie est normalisée une fois : ces mêmes valeurs vont à SQL et dans la clé du cache
+    query = request.args.get('query', '').strip()
+    volume = request.args.get('volume', '')
+    category = request.args.get('category', '')
+    grouped = request.args.get('format') == 'grouped'
+    fuzzy = request.args.get('fuzzy') == '1'
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit invalide'}), 400
+    try:
+        volume = int(volume) if volume else None
+    except ValueError:
+        return jsonify({'error': 'volume invalide'}), 400
+    
+    page = None
+    try:
+        cursor_param = request.args.get('cursor') or None
+        mode, text = search_mode(query, fuzzy)
+        if mode == 'fts' and cursor_param and cursor_mode(cursor_param) == 'like':
+            # Page suivante d'une recherche repliée sur LIKE (index plein texte inutilisable)
+            mode, text = 'like', query
+        order = SEARCH_ORDERS[mode]
+        after = decode_cursor(cursor_param, mode, len(order)) if cursor_param else None
+        
+        # Même recherche normalisée (valeurs envoyées à SQL, volume, catégorie, page) = même réponse
+        cache_key = (mode, text, volume, category, cursor_param, limit, grouped)
+        generation = db_generation()
+        cached = search_cache.get(cache_key, generation)
+        if cached is not None:
+            return conditional_json(*cached)
+        # Pas en cache : alors seulement les titres proches sont cherchés dans l'index
+        base_sql, params = search_base_query(mode, text, volume, category)
+        count = search_count_query(mode, text, volume, category, base_sql, params)
+        
+        with read_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                page = search_page(cursor, mode, base_sql, params, order, after, limit, count)
+            except sqlite3.OperationalError as e:
+                if mode != 'fts' or after:
+                    raise
+                print(f"⚠️ Recherche plein texte impossible ({e}), repli sur LIKE")
+                base_sql, params = like_base_query(query, volume, category)
+                page = search_page(cursor, 'like', base_sql, params, LIKE_ORDER, None, limit)
+                # Rangée sous le mode réellement utilisé, comme son curseur
+                cache_key = ('like', query) + cache_key[2:]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    results, next_cursor, total = page
+    if grouped:
+        response = {'threads': group_results(results), 'link_fields': LINK_FIELDS,
+                    'link_count': len(results), 'next_cursor': next_cursor}
+    else:
+        response = {'results': results, 'next_cursor': next_cursor}
+    if total is not None:
+        response['total'] = total
+        response['total_capped'] = total >= COUNT_CAP
+    
+    # Le corps sérialisé et son ETag sont mis en cache ensemble
+    body, etag = json_body(response)
+    search_cache.put(cache_key, generation, (body, etag))
+    return conditional_json(body, etag)
+
+# Recherche groupée (listes de séries) : nombre d'entrées par appel, liens renvoyés
+# par entrée, titres et liens par entrée trouvée en recherche approchée, liens au total
+BATCH_MAX = 300
+BATCH_ITEM_LIMIT = 500
+BATCH_FUZZY_TITLES = 10
+BATCH_FUZZY_LIMIT = 50
+BATCH_TOTAL_LIMIT = 10000
+
+def volume_range(value):
+    """(début, fin) d'un volume ou d'une plage ("5", 5, "3-7") ; None si vide"""
+    if value in (None, ''):
+        return None
+    match = re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?', str(value))
+    if not match:
+        raise ValueError(f"volume invalide : {value}")
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else start
+    return min(start, end), max(start, end)
+
+def batch_query(mode, entries, limit):
+    """Une requête pour toutes les entrées d'un même mode de la recherche groupée.
+    
+    entries : [(position, texte, volume, catégorie)] ; texte est la requête FTS,
+    la saisie (like) ou la liste des titres proches (fuzzy). Les entrées sont
+    jointes une fois (CTE items) et chacune garde ses limit premiers liens, dans
+    l'ordre de /api/search ; la colonne item donne la position de l'entrée.
+    Les CROSS JOIN fixent l'ordre des tables : des entrées vers leurs liens,
+    jamais un parcours de ed2k_links par entrée.
+    """
+    items = []
+    titles = []
+    for position, text, volume, category in entries:
+        start, stop = volume or (None, None)
+        if mode == 'fuzzy':
+            titles.extend(value for rank, title in enumerate(text) for value in (position, rank, title))
+            text = None
+        elif mode == 'like':
+            text = f"%{text}%"
+        items.extend([position, text, start, stop, category or ''])
+    ctes = [f"items(item, query, volume_start, volume_stop, category) AS "
+            f"(VALUES {', '.join('(?, ?, ?, ?, ?)' for _ in entries)})"]
+    # Mêmes conditions que search_filters(), avec le volume et la catégorie de chaque entrée
+    with_category = any(category for _, _, _, category in entries)
+    filters = """
+        AND (i.volume_start IS NULL OR l.volume BETWEEN i.volume_start AND i.volume_stop
+             OR (l.volume_end >= i.volume_start AND l.volume < i.volume_start))
+    """
+    if with_category:
+        filters += " AND (i.category = '' OR t.forum_category = i.category)"
+    
+    sort_columns = 'l.id, l.thread_id, l.volume, l.filename'
+    if mode == 'fuzzy':
+        ctes.append(f"fuzzy(item, title_rank, title) AS (VALUES {', '.join('(?, ?, ?)' for _ in range(len(titles) // 3))})")
+        body = f"""
+            SELECT i.item, {sort_columns}, f.title_rank
+            FROM fuzzy f
+            CROSS JOIN items i ON i.item = f.item
+            CROSS JOIN threads t ON t.thread_title = f.title
+            CROSS JOIN ed2k_links l ON l.thread_id = t.thread_id
+            WHERE 1=1{filters}
+        """
+    elif mode == 'fts':
+        ctes.append(f"""matches AS (
+            SELECT i.item, ed2k_fts.rowid, bm25(ed2k_fts, {', '.join(map(str, FTS_WEIGHTS))}) AS score
+            FROM items i JOIN ed2k_fts ON ed2k_fts MATCH i.query
+        )""")
+        body = f"""
+            SELECT i.item, {sort_columns}, MIN(m.score) OVER (PARTITION BY i.item, l.thread_id) AS thread_score
+            FROM matches m
+            CROSS JOIN items i ON i.item = m.item
+            CROSS JOIN ed2k_links l ON l.id = m.rowid
+            {'CROSS JOIN threads t ON t.thread_id = l.thread_id' if with_category else ''}
+            WHERE 1=1{filters}
+        """
+    else:
+        body = f"""
+            SELECT i.item, {sort_columns}, t.thread_title
+            FROM items i
+            CROSS JOIN threads t
+            CROSS JOIN ed2k_links l ON l.thread_id = t.thread_id
+            WHERE (l.filename LIKE i.query OR t.thread_title LIKE i.query){filters}
+        """
+    # Classement sur les seules colonnes de tri ; les autres colonnes ne sont lues
+    # que pour les liens gardés
+    ctes.append(f"""ranked AS (
+        SELECT item, id, ROW_NUMBER() OVER (PARTITION BY item ORDER BY {', '.join(SEARCH_ORDERS[mode])}) AS item_rank
+        FROM ({body})
+    )""")
+    sql = f"""
+        WITH {', '.join(ctes)}
+        SELECT r.item, {LINK_COLUMNS}
+        FROM ranked r CROSS JOIN ed2k_links l ON l.id = r.id
+        WHERE r.item_rank <= ?
+        ORDER BY r.item, r.item_rank
+    """
+    return sql, items + titles + [limit]
+
+def batch_rows(cursor, entries):
+    """Liens des entrées de la recherche groupée, par le même chemin que /api/search
+    (plein texte ou LIKE), puis par la recherche approchée pour celles qui ne
+    trouvent rien : une requête par mode, pas par entrée.
+    
+    entries : {position: (saisie, volume, catégorie)}. Retourne {position: (mode, lignes)} ;
+    au plus BATCH_ITEM_LIMIT + 1 lignes par entrée (BATCH_FUZZY_LIMIT + 1 en
+    recherche approchée), pour savoir si l'entrée a été tronquée.
+    """
+    def rows(mode, group, limit):
+        cursor.execute(*batch_query(mode, group, limit + 1))
+        for row in cursor.fetchall():
+            found.setdefault(row['item'], (mode, []))[1].append(row)
+    
+    found = {}
+    by_mode = {}
+    for position, (query, volume, category) in entries.items():
+        mode, text = search_mode(query)
+        by_mode.setdefault(mode, []).append((position, text, volume, category))
+    for mode, group in by_mode.items():
+        try:
+            rows(mode, group, BATCH_ITEM_LIMIT)
+        except sqlite3.OperationalError as e:
+            if mode != 'fts':
+                raise
+            print(f"⚠️ Recherche plein texte impossible ({e}), repli sur LIKE")
+            rows('like', [(position, entries[position][0], volume, category)
+                          for position, _, volume, category in group], BATCH_ITEM_LIMIT)
+    
+    missing = [position for position in entries if position not in found]
+    index = title_index() if missing else None
+    if index:
+        group = []
+        for position in missing:
+            query, volume, category = entries[position]
+            titles = [title for title, _ in index.similar(query, limit=BATCH_FUZZY_TITLES)]
+            if titles:
+                group.append((position, titles, volume, category))
+        if group:
+            rows('fuzzy', group, BATCH_FUZZY_LIMIT)
+        # Rien non plus en recherche approchée : c'est le dernier mode essayé
+        for position in missing:
+            found.setdefault(position, ('fuzzy', []))
+    return found
+
+@app.route('/api/search/batch', methods=['POST'])
+def search_batch():
+    """Recherche de toute une liste de séries en un appel.
+    
+    items : [{"query": "One Piece", "volume": "5-10", "category": "Mangas"}, ...]
+    (ou simplement des titres). Chaque entrée est cherchée comme par
+    /api/search (titre, nom de fichier, description), en recherche approchée
+    si rien ne correspond ; une requête par mode pour toutes les entrées, puis
+    les threads de toutes les entrées lus ensemble.
+    Retourne pour chaque entrée, dans l'ordre, ses threads au format groupé
+    (BATCH_TOTAL_LIMIT liens au plus pour l'ensemble des entrées).
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Aucune entrée fournie (items)'}), 400
+    if len(items) > BATCH_MAX:
+        return jsonify({'error': f'{BATCH_MAX} entrées maximum par requête'}), 400
+    
+    responses = []
+    entries = {}
+    for position, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'query': item}
+        response = {'item': position, 'query': None, 'mode': None, 'threads': [], 'link_count': 0}
+        responses.append(response)
+        if not isinstance(item, dict):
+            response['error'] = 'entrée invalide'
+            continue
+        query = str(item.get('query') or '').strip()
+        response['query'] = query
+        try:
+            volume = volume_range(item.get('volume'))
+        except ValueError as e:
+            response['error'] = str(e)
+            continue
+        if not query:
+            response['error'] = 'titre vide'
+            continue
+        entries[position] = (query, volume, item.get('category') or '')
+    
+    # Liens gardés par entrée, dans l'ordre des entrées, jusqu'à BATCH_TOTAL_LIMIT au total
+    kept = {}
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        found = batch_rows(cursor, entries) if entries else {}
+        budget = BATCH_TOTAL_LIMIT
+        for position in sorted(found):
+            mode, rows = found[position]
+            limit = min(BATCH_FUZZY_LIMIT if mode == 'fuzzy' else BATCH_ITEM_LIMIT, budget)
+            kept[position] = (mode, rows[:limit], len(rows) > limit)
+            budget -= len(kept[position][1])
+        threads = fetch_threads(cursor, {row['thread_id'] for _, rows, _ in kept.values() for row in rows})
+    
+    for position, (mode, rows, truncated) in kept.items():
+        results = [link_result(row, threads) for row in rows]
+        responses[position]['mode'] = mode
+        responses[position]['threads'] = group_results(results)
+        responses[position]['link_count'] = len(results)
+        if truncated:
+            responses[position]['truncated'] = True
+    
+    return jsonify({'results': responses, 'link_fields': LINK_FIELDS})
+
+@app.route('/api/suggest')
+def suggest():
+    text = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit invalide'}), 400
+    index = title_index()
+    suggestions = index.suggest(text, limit) if index else []
+    return jsonify({'suggestions': suggestions})
+
+# Entrées acceptées par appel de /api/links/lookup, et champs renvoyés pour chaque lien trouvé
+LOOKUP_MAX = 1000
+LOOKUP_FIELDS = ('id', 'link', 'filename', 'filesize', 'filesize_bytes', 'ed2k_hash',
+                 'thread_id', 'thread_title', 'thread_url', 'forum_category')
+
+def lookup_query(count):
+    """Liens dont le hash ed2k est dans une liste de count hashes (index idx_ed2k_links_hash)"""
+    columns = ', '.join(f"{'t' if field in THREAD_FIELDS else 'l'}.{field}" for field in LOOKUP_FIELDS)
+    return f"""
+        SELECT {columns}
+        FROM ed2k_links l LEFT JOIN threads t ON t.thread_id = l.thread_id
+        WHERE l.ed2k_hash IN ({', '.join('?' for _ in range(count))})
+        ORDER BY l.ed2k_hash, l.id
+    """
+
+@app.route('/api/links/lookup', methods=['POST'])
+def links_lookup():
+    """Quels fichiers sont déjà en base ? items : liens ed2k complets ou hashes MD4.
+    
+    Retourne les liens trouvés groupés par hash (un même fichier peut être
+    posté dans plusieurs threads ou sous plusieurs noms), les hashes absents
+    et les entrées illisibles.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Aucun lien ni hash fourni (items)'}), 400
+    if len(items) > LOOKUP_MAX:
+        return jsonify({'error': f'{LOOKUP_MAX} entrées maximum par requête'}), 400
+    
+    # Hashes dans l'ordre des entrées, chacun une fois (seen évite de relire la liste)
+    hashes = []
+    seen = set()
+    invalid = []
+    for item in items:
+        file_hash = lookup_hash(item) if isinstance(item, str) else None
+        if file_hash is None:
+            invalid.append(item)
+        elif file_hash not in seen:
+            seen.add(file_hash)
+            hashes.append(file_hash)
+    
+    matches = {}
+    if hashes:
+        with read_connection() as connection:
+            rows = connection.execute(lookup_query(len(hashes)), hashes).fetchall()
+        for row in rows:
+            matches.setdefault(row['ed2k_hash'], []).append({field: row[field] for field in LOOKUP_FIELDS})
+    
+    return jsonify({
+        'matches': matches,
+        'missing': [file_hash for file_hash in hashes if file_hash not in matches],
+        'invalid': invalid,
+    })
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify({'search': search_cache.stats()})
 
 @app.route('/covers/<path:filename>')
 def serve_cover(filename):
@@ -411,6 +1501,13 @@ def emule_test():
 if __name__ == '__main__':
     import os
     
+    parser = argparse.ArgumentParser(description="Serveur de recherche ed2k")
+    parser.add_argument('--rebuild-fts', action='store_true',
+                        help="reconstruit l'index de recherche plein texte puis quitte")
+    parser.add_argument('--explain', action='store_true',
+                        help="affiche le plan d'exécution des requêtes de recherche puis quitte")
+    args = parser.parse_args()
+    
     if not os.path.exists(DB_FILE):
         print("=" * 60)
         print("❌ ERREUR : Le fichier edbz.db est introuvable !")
@@ -423,6 +1520,27 @@ if __name__ == '__main__':
         input("\nAppuie sur Entrée pour quitter...")
         exit(1)
     
+    # Schéma à jour (tables et index), quelle que soit la version du scraper qui a créé la base
+    for version, description in migrate_file(DB_FILE):
+        print(f"✓ Migration {version} appliquée : {description}")
+    
+    # Lectures concurrentes des écritures du scraper
+    enable_wal()
+    
+    # Index plein texte : créé au premier lancement, tenu à jour par des triggers
+    init_fts(rebuild=args.rebuild_fts)
+    # Statistiques du planificateur refaites si la base a beaucoup changé depuis le dernier ANALYZE
+    analyzed = refresh_statistics_file(DB_FILE)
+    if analyzed:
+        print(f"✓ Statistiques du planificateur mises à jour ({', '.join(analyzed)})")
+    if args.rebuild_fts:
+        exit(0)
+    if args.explain:
+        exit(1 if check_query_plans() else 0)
+    
+    # Index des titres pour l'autocomplétion et la recherche approchée, prêt avant la première frappe
+    title_index()
+    
     print("=" * 60)
     print("🚀 Serveur de recherche ed2k démarré !")
     print("=" * 60)
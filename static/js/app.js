@@ -1,4 +1,9 @@
 let currentResults = [];
+let currentThreads = [];
+let currentParams = null;
+let nextCursor = null;
+let totalResults = null;
+let fuzzyResults = false;
 
 function formatBytes(bytes) {
     if (!bytes) return 'N/A';
@@ -28,20 +33,169 @@ async function searchLinks() {
         if (volume) params.append('volume', volume);
         if (category) params.append('category', category);
 
-        const response = await fetch(`/api/search?${params}`);
+        let data = await fetchResults(params, null);
+        fuzzyResults = false;
+        // Rien trouvé tel quel : retente en tolérant les fautes de frappe
+        if (query && data.total === 0) {
+            params.append('fuzzy', '1');
+            data = await fetchResults(params, null);
+            fuzzyResults = true;
+        }
+        currentParams = params;
+        currentResults = [];
+        currentThreads = [];
+        mergeThreads(data);
+        nextCursor = data.next_cursor;
+        totalResults = data.total_capped ? `${data.total}+` : data.total;
+        displayResults(currentThreads);
+    } catch (error) {
+        resultsDiv.innerHTML = '<div class="no-results"><h2>Erreur</h2><p>' + error + '</p></div>';
+    }
+}
+
+// Autocomplétion : interroge /api/suggest 150 ms après la dernière frappe
+let suggestTimer = null;
+let suggestController = null;
+let activeSuggestion = -1;
+
+function scheduleSuggestions() {
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(fetchSuggestions, 150);
+}
+
+async function fetchSuggestions() {
+    const query = document.getElementById('searchInput').value.trim();
+    if (query.length < 2) {
+        hideSuggestions();
+        return;
+    }
+
+    // Annule la requête précédente encore en cours
+    if (suggestController) suggestController.abort();
+    suggestController = new AbortController();
+    try {
+        const response = await fetch(`/api/suggest?${new URLSearchParams({q: query, limit: 8})}`,
+                                     {signal: suggestController.signal});
         const data = await response.json();
+        showSuggestions(data.suggestions || []);
+    } catch (error) {
+        if (error.name !== 'AbortError') hideSuggestions();
+    }
+}
+
+function showSuggestions(suggestions) {
+    const box = document.getElementById('suggestions');
+    activeSuggestion = -1;
+    if (suggestions.length === 0) {
+        hideSuggestions();
+        return;
+    }
+    // Les titres viennent du forum : insérés en texte, jamais en HTML
+    box.replaceChildren(...suggestions.map((suggestion, index) => {
+        const item = document.createElement('div');
+        item.className = 'suggestion-item';
+        item.dataset.index = index;
+        item.addEventListener('mousedown', () => pickSuggestion(item));
+        const title = document.createElement('span');
+        title.className = 'suggestion-title';
+        title.textContent = suggestion.title;
+        const count = document.createElement('span');
+        count.className = 'suggestion-count';
+        count.textContent = `${suggestion.links} liens`;
+        item.append(title, count);
+        return item;
+    }));
+    box.style.display = 'block';
+}
+
+function hideSuggestions() {
+    clearTimeout(suggestTimer);
+    const box = document.getElementById('suggestions');
+    box.style.display = 'none';
+    box.innerHTML = '';
+    activeSuggestion = -1;
+}
+
+function pickSuggestion(item) {
+    document.getElementById('searchInput').value = item.querySelector('.suggestion-title').textContent;
+    hideSuggestions();
+    searchLinks();
+}
+
+function handleSuggestionKey(event) {
+    const items = document.querySelectorAll('#suggestions .suggestion-item');
+    if (event.key === 'Escape') {
+        hideSuggestions();
+        return;
+    }
+    if (items.length === 0) return;
+    if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+        event.preventDefault();
+        const step = event.key === 'ArrowDown' ? 1 : -1;
+        activeSuggestion = (activeSuggestion + step + items.length) % items.length;
+        items.forEach((item, index) => item.classList.toggle('active', index === activeSuggestion));
+    } else if (event.key === 'Enter' && activeSuggestion >= 0) {
+        event.preventDefault();
+        pickSuggestion(items[activeSuggestion]);
+    } else if (event.key === 'Enter') {
+        hideSuggestions();
+    }
+}
 
-        currentResults = data.results || [];
-        displayResults(currentResults);
+async function fetchResults(params, cursor) {
+    const pageParams = new URLSearchParams(params);
+    pageParams.append('format', 'grouped');
+    if (cursor) pageParams.append('cursor', cursor);
+    const response = await fetch(`/api/search?${pageParams}`);
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || `HTTP ${response.status}`);
+    return data;
+}
+
+// Charge la page de résultats suivante et l'ajoute à l'affichage
+async function loadMoreResults(button) {
+    if (!nextCursor) return;
+    button.disabled = true;
+    button.textContent = '⏳ Chargement...';
+    try {
+        const data = await fetchResults(currentParams, nextCursor);
+        mergeThreads(data);
+        nextCursor = data.next_cursor;
+        displayResults(currentThreads);
     } catch (error) {
-        resultsDiv.innerHTML = '<div class="no-results"><h2>Erreur</h2><p>' + error + '</p></div>';
+        button.disabled = false;
+        button.textContent = 'Charger plus de résultats';
+        alert('Erreur: ' + error.message);
     }
 }
 
-function displayResults(results) {
+// Ajoute une page de résultats groupés par le serveur aux threads déjà affichés
+function mergeThreads(data) {
+    const fields = data.link_fields;
+    (data.threads || []).forEach(thread => {
+        const links = thread.links.map(values => {
+            const link = {};
+            fields.forEach((field, i) => link[field] = values[i]);
+            return link;
+        });
+        currentResults = currentResults.concat(links);
+
+        // Un thread peut continuer sur la page suivante
+        const last = currentThreads[currentThreads.length - 1];
+        const existing = last && last.thread_id === thread.thread_id ? last
+            : currentThreads.find(t => t.thread_id === thread.thread_id);
+        if (existing) {
+            existing.links = existing.links.concat(links);
+        } else {
+            currentThreads.push({...thread, links: links});
+        }
+    });
+}
+
+function displayResults(threads) {
     const resultsDiv = document.getElementById('results');
     
-    if (results.length === 0) {
+    if (threads.length === 0) {
         resultsDiv.innerHTML = `
             <div class="no-results">
                 <h2>😕 Aucun résultat</h2>
@@ -51,29 +205,20 @@ function displayResults(results) {
         return;
     }
 
-    // Groupe les résultats par thread
-    const grouped = {};
-    results.forEach(result => {
-        if (!grouped[result.thread_id]) {
-            grouped[result.thread_id] = {
-                title: result.thread_title,
-                url: result.thread_url,
-                category: result.forum_category,
-                cover_image: result.cover_image,
-                description: result.description,
-                links: []
-            };
-        }
-        grouped[result.thread_id].links.push(result);
-    });
-
+    // Threads déjà groupés par le serveur, dans l'ordre de pertinence
     let html = '';
-    if (results.length > 1) {
-        html += `<button class="copy-all-button" onclick="copyAllLinks()">📋 Copier tous les liens (${results.length})</button>`;
+    if (fuzzyResults) {
+        html += `<div class="results-count">🔎 Aucun résultat exact, voici les titres les plus proches</div>`;
+    }
+    if (totalResults !== null && nextCursor) {
+        html += `<div class="results-count">${currentResults.length} liens affichés sur ${totalResults}</div>`;
+    }
+    if (currentResults.length > 1) {
+        html += `<button class="copy-all-button" onclick="copyAllLinks()">📋 Copier tous les liens (${currentResults.length})</button>`;
     }
 
-    for (const threadId in grouped) {
-        const thread = grouped[threadId];
+    for (const thread of threads) {
+        const threadId = thread.thread_id;
         
         html += `
             <div class="result-card">
@@ -84,8 +229,8 @@ function displayResults(results) {
                     }
                 </div>
                 <div class="result-content">
-                    <div class="result-title">${thread.title}</div>
-                    <span class="result-category">${thread.category || 'Non catégorisé'}</span>
+                    <div class="result-title">${thread.thread_title}</div>
+                    <span class="result-category">${thread.forum_category || 'Non catégorisé'}</span>
                     
                     ${thread.description ? 
                         `<div class="description">${thread.description}</div>` 
@@ -96,7 +241,8 @@ function displayResults(results) {
         `;
 
         thread.links.forEach((link, index) => {
-            const volumeDisplay = link.volume ? `<div class="volume-badge">Vol. ${link.volume}</div>` : '';
+            const volumeLabel = link.volume_end ? `${link.volume}-${link.volume_end}` : link.volume;
+            const volumeDisplay = link.volume ? `<div class="volume-badge">Vol. ${volumeLabel}</div>` : '';
             html += `
                 <div class="file-item">
                     <div style="display: flex; align-items: center; gap: 10px; flex: 1;">
@@ -119,6 +265,10 @@ function displayResults(results) {
         `;
     }
 
+    if (nextCursor) {
+        html += `<button class="copy-all-button load-more-button" onclick="loadMoreResults(this)">Charger plus de résultats</button>`;
+    }
+
     resultsDiv.innerHTML = html;
     
     // Vérifie si aMule est activé pour afficher/cacher les boutons
@@ -286,6 +436,9 @@ window.onclick = function(event) {
     if (event.target == modal) {
         closeSettings();
     }
+    if (!event.target.closest('.search-input-wrapper')) {
+        hideSuggestions();
+    }
 }
 
 // Charge le statut au démarrage